@@ -0,0 +1,187 @@
+import os
+import json
+import math
+import time
+import argparse
+import logging
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Dict, Iterator, List, Optional, Set
+
+from example import run_compliance_pipeline, set_llm_concurrency
+from metrics import metrics, configure_logging, enable_metrics
+
+log = logging.getLogger(__name__)
+
+# ========== CONFIG ==========
+BATCH_WORKERS = 8
+BATCH_LLM_CONCURRENCY = 16
+FSYNC_EVERY = 20
+
+# The results file doubles as the checkpoint: every line is flushed as soon as a
+# transcript finishes, and a restarted run skips ids that already have an "ok" line.
+
+
+# ========== INPUT ==========
+def iter_transcripts(source: str) -> Iterator[Dict[str, Any]]:
+    # JSONL: one {"id", "transcript", "product_types"?, "risk_scenarios"?} object per line.
+    # Directory: one .txt (raw transcript) or .json (same object as a JSONL line) per call.
+    if os.path.isdir(source):
+        for name in sorted(os.listdir(source)):
+            path = os.path.join(source, name)
+            stem, ext = os.path.splitext(name)
+            if ext == ".txt":
+                with open(path, "r") as f:
+                    yield {"id": stem, "transcript": f.read()}
+            elif ext == ".json":
+                with open(path, "r") as f:
+                    yield {"id": stem, **json.load(f)}
+        return
+
+    with open(source, "r") as f:
+        for line_no, line in enumerate(f, 1):
+            if line.strip():
+                record = json.loads(line)
+                record.setdefault("id", f"line-{line_no}")
+                yield record
+
+
+# ========== CHECKPOINT ==========
+def load_completed(output_path: str) -> Set[str]:
+    if not os.path.exists(output_path):
+        return set()
+
+    # A crash can leave a partial last line; cut it so appended results stay valid JSONL.
+    with open(output_path, "rb+") as f:
+        data = f.read()
+        if data and not data.endswith(b"\n"):
+            f.truncate(data.rfind(b"\n") + 1)
+
+    completed = set()
+    with open(output_path, "r") as f:
+        for line in f:
+            result = json.loads(line)
+            if result.get("status") == "ok":
+                completed.add(result["id"])
+    return completed
+
+
+# ========== SUMMARY ==========
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    # nearest-rank percentile
+    rank = max(1, math.ceil(pct / 100.0 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(latencies: List[float], failures: int, skipped: int, elapsed: float) -> Dict[str, Any]:
+    processed = len(latencies) + failures
+    return {
+        "processed": processed,
+        "succeeded": len(latencies),
+        "failed": failures,
+        "skipped_from_checkpoint": skipped,
+        "elapsed_seconds": round(elapsed, 3),
+        "calls_per_minute": round(processed / elapsed * 60, 2) if elapsed > 0 else 0.0,
+        "latency_p50_seconds": round(percentile(latencies, 50), 3),
+        "latency_p95_seconds": round(percentile(latencies, 95), 3),
+    }
+
+
+# ========== BATCH RUN ==========
+def _score(record: Dict[str, Any], product_types: List[str]) -> Dict[str, Any]:
+    started = time.perf_counter()
+    try:
+        output = run_compliance_pipeline(
+            record["transcript"],
+            record.get("product_types") or product_types,
+            record.get("risk_scenarios"),
+        )
+        result = {
+            "id": record["id"],
+            "status": "ok",
+            "entities": output["entities"],
+            "order_checks": output["order_checks"],
+            "suitability_checks": output["suitability_checks"],
+        }
+    except Exception as e:
+        result = {"id": record["id"], "status": "error", "error": f"{type(e).__name__}: {e}"}
+    result["latency_seconds"] = round(time.perf_counter() - started, 3)
+    return result
+
+
+def run_batch(
+    source: str,
+    output_path: str,
+    product_types: List[str],
+    workers: int = BATCH_WORKERS,
+    llm_concurrency: int = BATCH_LLM_CONCURRENCY,
+) -> Dict[str, Any]:
+    set_llm_concurrency(llm_concurrency)
+    completed = load_completed(output_path)
+    if completed:
+        log.info(f"🔁 Resuming: {len(completed)} transcripts already scored in {output_path}")
+
+    latencies, failures, skipped, written = [], 0, 0, 0
+    started = time.perf_counter()
+    with open(output_path, "a") as out, ThreadPoolExecutor(max_workers=workers) as pool:
+        def write(result: Dict[str, Any]) -> None:
+            nonlocal failures, written
+            out.write(json.dumps(result, default=str) + "\n")
+            out.flush()
+            written += 1
+            if written % FSYNC_EVERY == 0:
+                os.fsync(out.fileno())
+            metrics.count("batch_results", status=result["status"])
+            if result["status"] == "ok":
+                latencies.append(result["latency_seconds"])
+                metrics.observe("transcript_latency_seconds", result["latency_seconds"])
+            else:
+                failures += 1
+                log.warning(f"⚠️ {result['id']}: {result['error']}")
+
+        pending = set()
+        for record in iter_transcripts(source):
+            if record["id"] in completed:
+                skipped += 1
+                continue
+            # Keep the input streaming: never more than 2 x workers transcripts in memory.
+            if len(pending) >= workers * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    write(future.result())
+            pending.add(pool.submit(_score, record, product_types))
+        for future in pending:
+            write(future.result())
+        os.fsync(out.fileno())
+
+    summary = summarize(latencies, failures, skipped, time.perf_counter() - started)
+    log.info(f"📊 Batch summary: {json.dumps(summary)}")
+    metrics.write_report(time.strftime("batch-%Y%m%d-%H%M%S"))
+    return summary
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Score an archive of call transcripts with the compliance pipeline.")
+    parser.add_argument("--input", required=True, help="JSONL file or directory of transcripts")
+    parser.add_argument("--output", required=True, help="JSONL results file (also the resume checkpoint)")
+    parser.add_argument("--product-types", default="", help="Comma-separated product types for records without their own")
+    parser.add_argument("--workers", type=int, default=BATCH_WORKERS)
+    parser.add_argument("--llm-concurrency", type=int, default=BATCH_LLM_CONCURRENCY)
+    parser.add_argument("--summary", help="Optional path to write the run summary as JSON")
+    parser.add_argument("--metrics", action="store_true", help="Write a metrics report (same as COMPLISENSE_METRICS=1)")
+    args = parser.parse_args(argv)
+    configure_logging()
+    if args.metrics:
+        enable_metrics()
+
+    product_types = [p.strip() for p in args.product_types.split(",") if p.strip()]
+    summary = run_batch(args.input, args.output, product_types, args.workers, args.llm_concurrency)
+    if args.summary:
+        with open(args.summary, "w") as f:
+            json.dump(summary, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
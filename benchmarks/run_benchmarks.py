@@ -0,0 +1,333 @@
+import os
+import sys
+import json
+import time
+import shutil
+import asyncio
+import argparse
+import platform
+import resource
+import importlib
+import subprocess
+import tempfile
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks.synthetic import SIZES, write_corpus, extraction_responder, compliance_responder
+from metrics import metrics, configure_logging, enable_metrics
+from model_backends import use_backend
+from embedding_client import MAX_BATCH_SIZE, MAX_BATCH_TOKENS
+from disclosure_matcher import EMBED_BATCH_SIZE
+
+# ========== CONFIG ==========
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+DEFAULT_SIZES = "small,medium"
+CHAT_LATENCY = 0.02        # seconds per fake chat (ingestion) call
+LLM_LATENCY = 0.05         # seconds per fake LLM (post-call check) call
+EMBEDDING_LATENCY = 0.01   # seconds per fake embedding request
+EXTRACTION_CONCURRENCY = 8
+POSTCALL_WORKERS = 8
+CACHE_DIRS = (".ingestion_cache", ".vector_index", "normalized_knowledge")
+IMPORT_MODULES = (
+    "stage1_ingestion.main", "stage1_ingestion.pdf_stream", "stage1_ingestion.product_checklist_retrival",
+    "example", "disclosure_matcher", "transcript_index", "live_monitor", "batch_runner",
+)
+HEAVY_MODULES = ("numpy", "PyPDF2", "sklearn", "vertexai", "langchain", "langchain_core", "google.api_core")
+IMPORT_REPEATS = 3
+
+# Usage (from the repo root):
+#   python -m benchmarks.run_benchmarks --sizes small,medium,large
+#   python -m benchmarks.run_benchmarks --compare benchmarks/results/<older>.json
+# Every model call goes to the deterministic fakes, so results only move when the code does.
+
+
+def git_commit() -> Dict[str, Any]:
+    def git(*args: str) -> str:
+        try:
+            return subprocess.run(["git", *args], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return ""
+    return {"commit": git("rev-parse", "HEAD"), "dirty": bool(git("status", "--porcelain", "--untracked-files=no"))}
+
+
+@contextmanager
+def measured(result: Dict[str, Any], trace_memory: bool):
+    # Wall time, peak RSS after the phase and, optionally, peak traced Python allocations
+    if trace_memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        result["seconds"] = round(time.perf_counter() - started, 4)
+        result["max_rss_mb"] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+        if trace_memory:
+            result["peak_traced_mb"] = round(tracemalloc.get_traced_memory()[1] / 2 ** 20, 2)
+            tracemalloc.stop()
+
+
+def _rate(count: float, seconds: float) -> float:
+    return round(count / seconds, 2) if seconds > 0 else 0.0
+
+
+def _clear_caches() -> None:
+    for folder in CACHE_DIRS:
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+# ========== PHASES ==========
+def bench_imports(modules=IMPORT_MODULES, repeats: int = IMPORT_REPEATS) -> Dict[str, Any]:
+    # Cold import of each module in a fresh interpreter (best of `repeats`), and which
+    # heavy dependencies that import pulled in.
+    probe = (
+        "import sys, json, time\n"
+        "started = time.perf_counter()\n"
+        "import {module}\n"
+        "print(json.dumps([time.perf_counter() - started, [m for m in {heavy!r} if m in sys.modules]]))\n"
+    )
+    env = dict(os.environ, COMPLISENSE_MODEL_BACKEND="fake")
+    results = {}
+    for module in modules:
+        runs = []
+        for _ in range(repeats):
+            completed = subprocess.run(
+                [sys.executable, "-c", probe.format(module=module, heavy=HEAVY_MODULES)],
+                cwd=ROOT, env=env, capture_output=True, text=True,
+            )
+            if completed.returncode != 0:
+                results[module] = {"error": completed.stderr.strip().splitlines()[-1:]}
+                break
+            runs.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+        else:
+            results[module] = {"seconds": round(min(seconds for seconds, _ in runs), 4), "heavy_imports": runs[0][1]}
+    return results
+
+
+def bench_ingestion(corpus: Dict[str, Any], concurrency: int, trace_memory: bool) -> Dict[str, Any]:
+    ingestion = importlib.import_module("stage1_ingestion.main")
+    from stage1_ingestion.extraction_engine import ExtractionEngine
+    from stage1_ingestion.ingestion_cache import ResponseCache
+
+    results = {}
+    _clear_caches()
+    for run in ("cold", "warm"):
+        before = ingestion.get_chat_model().usage()
+        engine = ExtractionEngine(max_concurrency=concurrency, requests_per_minute=None)
+        cache = ResponseCache()
+        result = results[run] = {}
+        with measured(result, trace_memory):
+            ingestion.run_entity_extraction_pipeline(engine=engine, cache=cache)
+        cache.close()
+        after = ingestion.get_chat_model().usage()
+        result["llm_calls"] = after["calls"] - before["calls"]
+        result["prompt_tokens"] = after["prompt_tokens"] - before["prompt_tokens"]
+        result["pages_per_second"] = _rate(corpus["guide_pages"], result["seconds"])
+    return results
+
+
+def bench_retrieval(corpus: Dict[str, Any], trace_memory: bool) -> Dict[str, Any]:
+    retrieval = importlib.import_module("stage1_ingestion.product_checklist_retrival")
+    from stage1_ingestion import vector_index
+    from batch_runner import percentile
+
+    names = [product["name"] for product in corpus["catalog"]]
+    shutil.rmtree(".vector_index", ignore_errors=True)
+    vector_index._open_indexes.clear()
+
+    results = {"index_build": {}, "queries": {}}
+    with measured(results["index_build"], trace_memory):
+        retrieval.load_product_index()
+
+    latencies = []
+    with measured(results["queries"], trace_memory):
+        for name in names:
+            started = time.perf_counter()
+            retrieval.retrieve_product_with_window(name)
+            latencies.append(time.perf_counter() - started)
+    results["queries"].update({
+        "count": len(names),
+        "queries_per_second": _rate(len(names), results["queries"]["seconds"]),
+        "latency_p50_seconds": round(percentile(latencies, 50), 5),
+        "latency_p95_seconds": round(percentile(latencies, 95), 5),
+    })
+    return results
+
+
+def bench_postcall(corpus: Dict[str, Any], workers: int, trace_memory: bool) -> Dict[str, Any]:
+    example = importlib.import_module("example")
+    from batch_runner import percentile
+    transcripts = corpus["transcripts"]
+
+    def score(record: Dict[str, Any], batched: bool) -> float:
+        started = time.perf_counter()
+        example.run_compliance_pipeline(record["transcript"], record["product_types"], batched=batched)
+        return time.perf_counter() - started
+
+    results = {}
+    for mode, batched in (("per_check", False), ("batched", True)):
+        before = example.get_llm().backend.usage()
+        result = results[mode] = {}
+        with measured(result, trace_memory):
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                latencies = list(pool.map(lambda record: score(record, batched), transcripts))
+        after = example.get_llm().backend.usage()
+        result.update({
+            "transcripts": len(transcripts),
+            "transcripts_per_second": _rate(len(transcripts), result["seconds"]),
+            "latency_p50_seconds": round(percentile(latencies, 50), 4),
+            "latency_p95_seconds": round(percentile(latencies, 95), 4),
+            "llm_calls": after["calls"] - before["calls"],
+            "prompt_tokens": after["prompt_tokens"] - before["prompt_tokens"],
+        })
+    return results
+
+
+def bench_streaming(corpus: Dict[str, Any], trace_memory: bool) -> Dict[str, Any]:
+    # Every transcript streamed as one live call, all calls concurrently, one utterance per push
+    from live_monitor import LiveMonitor
+    from batch_runner import percentile
+    catalog = corpus["catalog"]
+    calls = {record["id"]: record["transcript"].splitlines() for record in corpus["transcripts"]}
+    monitor = LiveMonitor(
+        {product["name"]: [product["name"].lower()] for product in catalog},
+        {risk: [risk.lower()] for risk in {product["risk"] for product in catalog}},
+        {product["name"]: [product["risk"]] for product in catalog},
+        on_alert=lambda alert: None,
+    )
+    push_seconds: List[float] = []
+
+    async def stream(call_id: str, lines: List[str]) -> int:
+        for line in lines:
+            started = time.perf_counter()
+            await monitor.push(call_id, line)
+            push_seconds.append(time.perf_counter() - started)
+            await asyncio.sleep(0)
+        return len((await monitor.end_call(call_id))["alerts"])
+
+    async def stream_all() -> List[int]:
+        return await asyncio.gather(*(stream(call_id, lines) for call_id, lines in calls.items()))
+
+    result: Dict[str, Any] = {}
+    with measured(result, trace_memory):
+        alerts = asyncio.run(stream_all())
+    utterances = sum(len(lines) for lines in calls.values())
+    result.update({
+        "calls": len(calls),
+        "utterances": utterances,
+        "utterances_per_second": _rate(utterances, result["seconds"]),
+        "push_p95_seconds": round(percentile(push_seconds, 95), 6),
+        "alerts": sum(alerts),
+    })
+    return result
+
+
+# ========== REPORT ==========
+def compare(previous: Dict[str, Any], current: Dict[str, Any]) -> List[str]:
+    # One line per shared seconds/throughput figure: old, new and relative change
+    lines = []
+
+    def walk(old: Any, new: Any, path: str) -> None:
+        if isinstance(old, dict) and isinstance(new, dict):
+            for key in sorted(set(old) & set(new) - {"metrics"}):
+                walk(old[key], new[key], f"{path}.{key}" if path else key)
+        elif isinstance(old, (int, float)) and isinstance(new, (int, float)) and old and (
+            path.endswith("seconds") or path.endswith("_per_second")
+        ):
+            lines.append(f"{path:<60} {old:>12.4f} {new:>12.4f} {(new - old) / old:>+8.1%}")
+
+    walk({"imports": previous.get("imports", {}), **previous.get("sizes", {})},
+         {"imports": current.get("imports", {}), **current.get("sizes", {})}, "")
+    return lines
+
+
+def run(sizes: List[str], workdir: str, args: argparse.Namespace) -> Dict[str, Any]:
+    report = {
+        **git_commit(),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "backend": {"chat_latency": args.chat_latency, "llm_latency": args.llm_latency,
+                    "embedding_latency": args.embedding_latency},
+        "imports": bench_imports(),
+        "sizes": {},
+    }
+    cwd = os.getcwd()
+    try:
+        for size in sizes:
+            root = os.path.join(workdir, size)
+            corpus = write_corpus(root, SIZES[size], seed=args.seed)
+            os.chdir(root)
+            metrics.reset()
+            report["sizes"][size] = {
+                "corpus": {**SIZES[size], "guide_pages": corpus["guide_pages"]},
+                "ingestion": bench_ingestion(corpus, args.concurrency, args.trace_memory),
+                "retrieval": bench_retrieval(corpus, args.trace_memory),
+                "postcall": bench_postcall(corpus, args.workers, args.trace_memory),
+                "streaming": bench_streaming(corpus, args.trace_memory),
+                "metrics": metrics.report(),
+            }
+            os.chdir(cwd)
+    finally:
+        os.chdir(cwd)
+    return report
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Offline benchmarks for ingestion, retrieval and post-call checks.")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help=f"Comma-separated subset of {', '.join(SIZES)}")
+    parser.add_argument("--output", help="Results JSON (default: benchmarks/results/<commit>.json)")
+    parser.add_argument("--workdir", help="Where synthetic corpora are written (default: a temporary directory)")
+    parser.add_argument("--compare", help="Earlier results JSON to compare against")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--chat-latency", type=float, default=CHAT_LATENCY)
+    parser.add_argument("--llm-latency", type=float, default=LLM_LATENCY)
+    parser.add_argument("--embedding-latency", type=float, default=EMBEDDING_LATENCY)
+    parser.add_argument("--concurrency", type=int, default=EXTRACTION_CONCURRENCY)
+    parser.add_argument("--workers", type=int, default=POSTCALL_WORKERS)
+    parser.add_argument("--trace-memory", action="store_true", help="Also record peak Python allocations (slower)")
+    args = parser.parse_args(argv)
+
+    sizes = [s.strip() for s in args.sizes.split(",") if s.strip()]
+    unknown = [s for s in sizes if s not in SIZES]
+    if unknown:
+        parser.error(f"unknown sizes {unknown}, expected {list(SIZES)}")
+
+    configure_logging("WARNING")
+    enable_metrics()
+    use_backend(
+        "fake",
+        chat={"latency": args.chat_latency, "responder": extraction_responder, "seed": args.seed},
+        llm={"latency": args.llm_latency, "responder": compliance_responder, "seed": args.seed},
+        # Enforce the provider batch limit the embedding client is sized for
+        text_embedding={"latency": args.embedding_latency, "seed": args.seed,
+                        "max_batch_size": MAX_BATCH_SIZE, "max_batch_tokens": MAX_BATCH_TOKENS},
+        embeddings={"latency": args.embedding_latency, "seed": args.seed, "max_batch_size": EMBED_BATCH_SIZE},
+    )
+
+    if args.workdir:
+        report = run(sizes, os.path.abspath(args.workdir), args)
+    else:
+        with tempfile.TemporaryDirectory(prefix="complisense-bench-") as workdir:
+            report = run(sizes, workdir, args)
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{(report['commit'] or 'unknown')[:12]}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"📊 Benchmark results written to {output}")
+
+    if args.compare:
+        with open(args.compare, "r") as f:
+            previous = json.load(f)
+        print(f"{'figure':<60} {'before':>12} {'after':>12} {'change':>8}")
+        print("\n".join(compare(previous, report)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+import os
+import re
+import json
+import random
+from typing import Any, Dict, List, Tuple
+
+# Deterministic synthetic inputs for the benchmarks: product-guide and disclosure PDFs,
+# checklists, risk scenarios and timestamped call transcripts, plus responders that let
+# the fake models answer the pipelines' prompts in the shapes their parsers expect.
+
+PRODUCT_FAMILIES = [
+    "FX Forward", "Bond", "Equity Option", "Structured Note",
+    "Interest Rate Swap", "Dual Currency Deposit", "Commodity Swap", "Credit Linked Note",
+]
+RISK_TYPES = ["Market Risk", "Liquidity Risk", "Credit Risk", "Currency Risk"]
+FILLER_WORDS = (
+    "client investment tenor notional settlement maturity coupon premium strike barrier "
+    "counterparty collateral exposure hedging valuation margin fee spread yield reference "
+    "rate index redemption early termination suitability horizon objective portfolio"
+).split()
+
+LINES_PER_PAGE = 50
+LINE_WIDTH = 90
+
+SIZES = {
+    "small": {"products": 8, "pages_per_product": 2, "transcripts": 20, "utterances": 60},
+    "medium": {"products": 32, "pages_per_product": 4, "transcripts": 50, "utterances": 200},
+    "large": {"products": 96, "pages_per_product": 8, "transcripts": 100, "utterances": 600},
+}
+
+
+# ========== PRODUCTS ==========
+def product_catalog(count: int) -> List[Dict[str, str]]:
+    # name as spoken and written in the guide, type as used for file names
+    catalog = []
+    for i in range(count):
+        name = f"{PRODUCT_FAMILIES[i % len(PRODUCT_FAMILIES)]} {i // len(PRODUCT_FAMILIES) + 1}"
+        catalog.append({"name": name, "type": name.replace(" ", "_"), "risk": RISK_TYPES[i % len(RISK_TYPES)]})
+    return catalog
+
+
+def _sentence(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(FILLER_WORDS) for _ in range(words)).capitalize() + "."
+
+
+def _wrap(text: str, width: int = LINE_WIDTH) -> List[str]:
+    lines, current = [], ""
+    for word in text.split():
+        if current and len(current) + 1 + len(word) > width:
+            lines.append(current)
+            current = word
+        else:
+            current = f"{current} {word}" if current else word
+    if current:
+        lines.append(current)
+    return lines
+
+
+def risk_script(product: Dict[str, str]) -> str:
+    return (f"The value of {product['name']} can fall because of {product['risk'].lower()}. "
+            f"You may lose part or all of the amount invested and early termination may be costly.")
+
+
+# ========== PDF ==========
+def _pdf_escape(line: str) -> str:
+    return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def write_text_pdf(path: str, pages: List[List[str]]) -> None:
+    # Minimal single-font PDF, one text line per entry; enough for PyPDF2 text extraction.
+    objects = ["<< /Type /Catalog /Pages 2 0 R >>", None, "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    page_ids = []
+    for lines in pages:
+        body = "BT /F1 10 Tf 12 TL 50 800 Td " + " ".join(f"({_pdf_escape(line)}) Tj T*" for line in lines) + " ET"
+        objects.append(f"<< /Length {len(body.encode('latin-1'))} >>\nstream\n{body}\nendstream")
+        objects.append(f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] "
+                       f"/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>")
+        page_ids.append(len(objects))
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(f'{i} 0 R' for i in page_ids)}] /Count {len(page_ids)} >>"
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n".encode("latin-1")
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("latin-1")
+    out += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode("latin-1")
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode("latin-1")
+    with open(path, "wb") as f:
+        f.write(out)
+
+
+def _paginate(lines: List[str]) -> List[List[str]]:
+    return [lines[i:i + LINES_PER_PAGE] for i in range(0, len(lines), LINES_PER_PAGE)] or [[]]
+
+
+def product_guide_lines(catalog: List[Dict[str, str]], pages_per_product: int, seed: int = 0) -> List[str]:
+    rng = random.Random(seed)
+    lines = []
+    for product in catalog:
+        lines += [f"Product: {product['name']}", f"Product Type: {product['type']}", ""]
+        body = " ".join(_sentence(rng, rng.randint(8, 20)) for _ in range(pages_per_product * LINES_PER_PAGE))
+        lines += _wrap(f"{product['name']} overview. {body}")[:pages_per_product * LINES_PER_PAGE - 4] + [""]
+    return lines
+
+
+def disclosure_lines(catalog: List[Dict[str, str]], seed: int = 1) -> List[str]:
+    rng = random.Random(seed)
+    lines = []
+    for product in catalog:
+        lines += [f"Disclosure: {product['name']} {product['risk']}", f"Risk Type: {product['risk']}"]
+        lines += _wrap(risk_script(product) + " " + _sentence(rng, 30)) + [""]
+    return lines
+
+
+# ========== TRANSCRIPTS ==========
+def _timestamp(seconds: int) -> str:
+    if seconds >= 3600:
+        return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+    return f"{seconds // 60:02d}:{seconds % 60:02d}"
+
+
+def make_transcript(catalog: List[Dict[str, str]], utterances: int, seed: int) -> Tuple[str, List[str]]:
+    # Returns (transcript, product types discussed). Each product is discussed over a
+    # contiguous stretch of the call; its risk script is read out about half the time.
+    rng = random.Random(seed)
+    products = rng.sample(catalog, k=min(len(catalog), rng.randint(1, 3)))
+    stretch = max(4, utterances // (len(products) + 1))
+    lines, seconds = [], 0
+    for i in range(utterances):
+        speaker = "Agent" if i % 2 == 0 else "Customer"
+        slot = i // stretch
+        text = _sentence(rng, rng.randint(6, 18))
+        if slot < len(products):
+            product = products[slot]
+            offset = i - slot * stretch
+            if offset == 0:
+                text = f"Let's discuss {product['name']} today. {text}"
+            elif offset == 2 and speaker == "Agent" and rng.random() < 0.5:
+                text = risk_script(product)
+            elif offset == 4:
+                text = f"For the {product['name']}, {text.lower()}"
+        lines.append(f"[{_timestamp(seconds)}] {speaker}: {text}")
+        seconds += rng.randint(4, 20)
+    return "\n".join(lines) + "\n", [product["type"] for product in products]
+
+
+# ========== CORPUS ==========
+def write_corpus(root: str, size: Dict[str, int], seed: int = 0) -> Dict[str, Any]:
+    # Lays out the same relative paths the pipelines read from (client_inputs/,
+    # products_checklist/, risk_scenarios/), so benchmarks run with root as the cwd.
+    catalog = product_catalog(size["products"])
+    for folder in ("client_inputs", "products_checklist", "risk_scenarios"):
+        os.makedirs(os.path.join(root, folder), exist_ok=True)
+
+    guide_pages = _paginate(product_guide_lines(catalog, size["pages_per_product"], seed))
+    write_text_pdf(os.path.join(root, "client_inputs", "product_guide.pdf"), guide_pages)
+    write_text_pdf(os.path.join(root, "client_inputs", "risk_disclosures.pdf"), _paginate(disclosure_lines(catalog, seed + 1)))
+    with open(os.path.join(root, "client_inputs", "disclosure_flags.json"), "w") as f:
+        json.dump({"required_disclosures": sorted({product["risk"] for product in catalog})}, f)
+
+    for product in catalog:
+        with open(os.path.join(root, "products_checklist", f"{product['type']}.txt"), "w") as f:
+            f.write(f"1. Confirm the client wants {product['name']}.\n2. Confirm quantity, price and currency.\n"
+                    f"3. Confirm order validity.\n4. Read back the order.\n")
+        with open(os.path.join(root, "risk_scenarios", f"{product['type']}.txt"), "w") as f:
+            f.write(risk_script(product) + "\n")
+
+    transcripts = [
+        dict(zip(("transcript", "product_types"), make_transcript(catalog, size["utterances"], seed * 100003 + i)), id=f"call-{i:05d}")
+        for i in range(size["transcripts"])
+    ]
+    return {"catalog": catalog, "guide_pages": len(guide_pages), "transcripts": transcripts}
+
+
+# ========== FAKE MODEL RESPONDERS ==========
+# Chunk text is whitespace-joined tokens, so guide headings arrive on one line
+PRODUCT_LINE = re.compile(r"Product: (.+?)\s+Product Type: (\S+)")
+DISCLOSURE_LINE = re.compile(r"Disclosure: (.+?)\s+Risk Type: (\w+ Risk)")
+BATCH_ITEM = re.compile(r"\[id: (\w+)\]")
+PRODUCT_TYPES = re.compile(r"must be one of: ([^)\n]*)\)")
+
+
+def extraction_responder(prompt: str) -> str:
+    # stage1_ingestion.main.build_extraction_prompt -> YAML blocks separated by ---
+    if "for any disclosures" in prompt:
+        blocks = [f"disclosure_name: {name}\nrisk_type: {risk}" for name, risk in DISCLOSURE_LINE.findall(prompt)]
+    else:
+        blocks = [f"product_name: {name}\nproduct_type: {kind}" for name, kind in PRODUCT_LINE.findall(prompt)]
+    return "\n---\n".join(blocks)
+
+
+def compliance_responder(prompt: str) -> str:
+    # example.py prompts: entity extraction, batched checks, risk scenario, order taking
+    if "Extract all products discussed" in prompt:
+        allowed = PRODUCT_TYPES.search(prompt)
+        transcript = prompt.split("Transcript:", 1)[-1].lower()
+        found = [t.strip() for t in (allowed.group(1).split(",") if allowed else []) if t.strip()]
+        product_type = next((t for t in found if t.replace("_", " ").lower() in transcript), found[0] if found else "")
+        entity = {
+            "product_name": product_type.replace("_", " "), "product_type": product_type, "order_validity": "GTC",
+            "quantity_or_amount": "1,000,000", "price": "1.0850", "ccy": "USD",
+            "product_features": "synthetic", "timestamp": "00:00",
+        }
+        return "```json\n" + json.dumps(entity) + "\n```"
+    if "Respond with only a JSON array" in prompt:
+        return json.dumps([
+            {"id": item_id, "passed": True, "summary": "Synthetic verdict.", "reasons": ""}
+            for item_id in BATCH_ITEM.findall(prompt)
+        ])
+    if "risk scenario script was properly communicated" in prompt:
+        return "Yes\nJustification: synthetic verdict."
+    return "Checklist followed: Yes\nPass/Fail: Pass\nSynthetic verdict."
@@ -0,0 +1,177 @@
+import os
+import re
+import time
+import threading
+import logging
+from typing import Dict, List, Optional, Tuple
+
+import yaml
+
+log = logging.getLogger(__name__)
+
+# ========== CONFIG ==========
+CHECKLIST_FOLDER = "products_checklist"
+RISK_SCENARIO_FOLDER = "risk_scenarios"
+ALIASES_FILE = "product_aliases.yaml"  # canonical product type -> list of aliases
+RELOAD_INTERVAL_SECONDS = 5.0
+
+
+class RegistryValidationError(ValueError):
+    pass
+
+
+def normalize_product_type(product_type: str) -> str:
+    return re.sub(r"[\s_\-]+", " ", str(product_type)).strip().casefold()
+
+
+def _scan(folder: str) -> Dict[str, Tuple[str, float]]:
+    # product type (file stem) -> (path, mtime)
+    if not os.path.isdir(folder):
+        return {}
+    found = {}
+    for entry in os.scandir(folder):
+        if entry.is_file() and entry.name.endswith(".txt"):
+            found[entry.name[:-4]] = (entry.path, entry.stat().st_mtime)
+    return found
+
+
+# ========== REGISTRY ==========
+class ChecklistRegistry:
+    def __init__(
+        self,
+        checklist_folder: str = CHECKLIST_FOLDER,
+        risk_scenario_folder: str = RISK_SCENARIO_FOLDER,
+        aliases_path: Optional[str] = None,
+        reload_interval: float = RELOAD_INTERVAL_SECONDS,
+        strict: bool = False,
+    ):
+        self.checklist_folder = checklist_folder
+        self.risk_scenario_folder = risk_scenario_folder
+        self.aliases_path = aliases_path or os.path.join(checklist_folder, ALIASES_FILE)
+        self.reload_interval = reload_interval
+        self.strict = strict
+        self._lock = threading.Lock()
+        self._checked_at = 0.0
+        self._mtimes: Dict[str, float] = {}
+        self._texts: Dict[str, str] = {}  # path -> file contents
+        self._checklists: Dict[str, str] = {}
+        self._risk_scenarios: Dict[str, str] = {}
+        self._aliases: Dict[str, str] = {}
+        self.load()
+
+    def _read(self, path: str, mtime: float) -> str:
+        if self._mtimes.get(path) != mtime:
+            with open(path, "r") as f:
+                self._texts[path] = f.read()
+            self._mtimes[path] = mtime
+        return self._texts[path]
+
+    def _load_aliases(self, known: Dict[str, str]) -> Tuple[Dict[str, str], List[str]]:
+        aliases = {key: product_type for key, product_type in known.items()}
+        problems = []
+        if not os.path.exists(self.aliases_path):
+            return aliases, problems
+        mtime = os.path.getmtime(self.aliases_path)
+        data = yaml.safe_load(self._read(self.aliases_path, mtime)) or {}
+        for canonical, names in data.items():
+            target = known.get(normalize_product_type(canonical))
+            if target is None:
+                problems.append(f"alias target '{canonical}' has no checklist or risk scenario")
+                continue
+            for name in [names] if isinstance(names, str) else names or []:
+                key = normalize_product_type(name)
+                if aliases.get(key, target) != target:
+                    problems.append(f"alias '{name}' maps to both '{aliases[key]}' and '{target}'")
+                    continue
+                aliases[key] = target
+        return aliases, problems
+
+    def load(self) -> None:
+        with self._lock:
+            checklist_files = _scan(self.checklist_folder)
+            scenario_files = _scan(self.risk_scenario_folder)
+            problems = []
+            if not checklist_files:
+                problems.append(f"no checklists found in '{self.checklist_folder}'")
+
+            checklists, risk_scenarios = {}, {}
+            for target, files, label in (
+                (checklists, checklist_files, "checklist"),
+                (risk_scenarios, scenario_files, "risk scenario"),
+            ):
+                for product_type, (path, mtime) in files.items():
+                    text = self._read(path, mtime).strip()
+                    if not text:
+                        problems.append(f"{label} '{path}' is empty")
+                        continue
+                    target[product_type] = text
+
+            known = {normalize_product_type(t): t for t in list(checklists) + list(risk_scenarios)}
+            aliases, alias_problems = self._load_aliases(known)
+            problems.extend(alias_problems)
+
+            if problems:
+                message = "; ".join(problems)
+                if self.strict:
+                    raise RegistryValidationError(message)
+                log.warning(f"⚠️ Checklist registry: {message}")
+
+            live = {path for path, _ in checklist_files.values()} | {path for path, _ in scenario_files.values()}
+            if os.path.exists(self.aliases_path):
+                live.add(self.aliases_path)
+            self._texts = {path: text for path, text in self._texts.items() if path in live}
+            self._mtimes = {path: mtime for path, mtime in self._mtimes.items() if path in live}
+            self._checklists, self._risk_scenarios, self._aliases = checklists, risk_scenarios, aliases
+            self._checked_at = time.monotonic()
+
+    def _changed(self) -> bool:
+        current = {path: mtime for path, mtime in _scan(self.checklist_folder).values()}
+        current.update({path: mtime for path, mtime in _scan(self.risk_scenario_folder).values()})
+        if os.path.exists(self.aliases_path):
+            current[self.aliases_path] = os.path.getmtime(self.aliases_path)
+        return current != self._mtimes
+
+    def maybe_reload(self) -> None:
+        if time.monotonic() - self._checked_at < self.reload_interval:
+            return
+        if self._changed():
+            log.info("🔁 Checklist registry changed on disk, reloading...")
+            self.load()
+        else:
+            self._checked_at = time.monotonic()
+
+    def resolve(self, product_type: str) -> Optional[str]:
+        self.maybe_reload()
+        return self._aliases.get(normalize_product_type(product_type))
+
+    def names_for(self, product_type: str) -> List[str]:
+        # The product type plus every alias that resolves to it (normalized)
+        resolved = self.resolve(product_type)
+        if resolved is None:
+            return [product_type]
+        return [resolved] + [name for name, target in self._aliases.items() if target == resolved]
+
+    def get_checklist(self, product_type: str) -> Optional[str]:
+        resolved = self.resolve(product_type)
+        return self._checklists.get(resolved) if resolved else None
+
+    def get_risk_scenario(self, product_type: str) -> Optional[str]:
+        resolved = self.resolve(product_type)
+        return self._risk_scenarios.get(resolved) if resolved else None
+
+    def risk_scenarios(self) -> Dict[str, str]:
+        self.maybe_reload()
+        return dict(self._risk_scenarios)
+
+
+# ========== PROCESS-WIDE ACCESS ==========
+_registries: Dict[Tuple[str, str], ChecklistRegistry] = {}
+_registries_lock = threading.Lock()
+
+
+def get_registry(checklist_folder: str = CHECKLIST_FOLDER, risk_scenario_folder: str = RISK_SCENARIO_FOLDER) -> ChecklistRegistry:
+    key = (os.path.abspath(checklist_folder), os.path.abspath(risk_scenario_folder))
+    with _registries_lock:
+        if key not in _registries:
+            _registries[key] = ChecklistRegistry(checklist_folder, risk_scenario_folder)
+        return _registries[key]
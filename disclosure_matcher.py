@@ -0,0 +1,147 @@
+import threading
+from collections import OrderedDict
+from typing import Any, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from embedding_client import EmbeddingClient, get_embedding_client
+from metrics import metrics
+from transcript_index import index_transcript
+
+# ========== CONFIG ==========
+EMBEDDING_MODEL_NAME = "textembedding-gecko@003"
+HIT_THRESHOLD = 0.85    # at or above: disclosed, no LLM call
+MISS_THRESHOLD = 0.60   # below: not disclosed, no LLM call; in between goes to the LLM
+WINDOW_UTTERANCES = 3   # a disclosure may be spread over a few consecutive utterances
+EMBED_BATCH_SIZE = 64
+TRANSCRIPT_CACHE_SIZE = 32
+
+
+def _unit_rows(vectors: Sequence[Sequence[float]]) -> np.ndarray:
+    matrix = np.asarray(vectors, dtype=np.float32)
+    if matrix.ndim != 2:
+        return np.zeros((0, 0), dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+# ========== MATCHER ==========
+class DisclosureMatcher:
+    def __init__(
+        self,
+        embedding_model: Any = None,
+        hit_threshold: float = HIT_THRESHOLD,
+        miss_threshold: float = MISS_THRESHOLD,
+        window_utterances: int = WINDOW_UTTERANCES,
+        batch_size: int = EMBED_BATCH_SIZE,
+    ):
+        self._embedding_model = embedding_model
+        self.hit_threshold = hit_threshold
+        self.miss_threshold = miss_threshold
+        self.window_utterances = window_utterances
+        self.batch_size = batch_size
+        self._client: Optional[EmbeddingClient] = None
+        self._lock = threading.Lock()
+        # Window vectors per transcript, for the model they were embedded with; script vectors
+        # come from the embedding client's own cache
+        self._transcripts: "OrderedDict[str, Tuple[np.ndarray, List[Tuple[int, int]]]]" = OrderedDict()
+        self._transcripts_model: Any = None
+
+    @property
+    def embedding_client(self) -> EmbeddingClient:
+        # An injected model gets a client of its own; otherwise share the process-wide one
+        if self._client is None:
+            if self._embedding_model is not None:
+                self._client = EmbeddingClient("embeddings", EMBEDDING_MODEL_NAME, self._embedding_model, max_batch_size=self.batch_size)
+            else:
+                self._client = get_embedding_client("embeddings", EMBEDDING_MODEL_NAME, max_batch_size=self.batch_size)
+        return self._client
+
+    def _embed(self, texts: List[str]) -> np.ndarray:
+        return _unit_rows(self.embedding_client.embed(texts))
+
+    def _windows(self, transcript: str) -> Tuple[np.ndarray, List[Tuple[int, int]]]:
+        # Embeds sliding windows of consecutive utterances once per transcript.
+        # Returns (unit vectors, [(first utterance, last utterance)] per window).
+        model = self.embedding_client.model
+        with self._lock:
+            if model is not self._transcripts_model:
+                # vectors from another model (e.g. after use_backend) are not comparable
+                self._transcripts.clear()
+                self._transcripts_model = model
+            cached = self._transcripts.get(transcript)
+            if cached is not None:
+                self._transcripts.move_to_end(transcript)
+        metrics.count("cache_requests", cache="transcript_embeddings", result="miss" if cached is None else "hit")
+        if cached is not None:
+            return cached
+
+        index = index_transcript(transcript)
+        if len(index):
+            units = [index.text(i) for i in range(len(index))]
+        else:
+            units = [line for line in transcript.splitlines() if line.strip()]
+        span = max(1, min(self.window_utterances, len(units)))
+        bounds = [(i, i + span - 1) for i in range(0, max(1, len(units) - span + 1))] if units else []
+        texts = ["\n".join(units[first:last + 1]) for first, last in bounds]
+        result = (self._embed(texts) if texts else np.zeros((0, 0), dtype=np.float32), bounds)
+
+        with self._lock:
+            if model is not self._transcripts_model:
+                return result
+            self._transcripts[transcript] = result
+            while len(self._transcripts) > TRANSCRIPT_CACHE_SIZE:
+                self._transcripts.popitem(last=False)
+        return result
+
+    def score(self, transcript: str, checks: List[Tuple[str, Optional[Tuple[int, int]]]]) -> List[Tuple[float, Optional[int]]]:
+        # checks: (scenario script, utterance window or None for the whole call).
+        # Returns (best similarity, best window index) per check from one matrix product.
+        window_vectors, bounds = self._windows(transcript)
+        if not checks or not bounds:
+            return [(0.0, None) for _ in checks]
+        similarity = self._embed([script for script, _ in checks]) @ window_vectors.T
+
+        firsts = np.array([first for first, _ in bounds])
+        lasts = np.array([last for _, last in bounds])
+        scored = []
+        for row, (_, utterances) in zip(similarity, checks):
+            if utterances is not None:
+                # only windows overlapping the product's discussion
+                row = np.where((lasts >= utterances[0]) & (firsts <= utterances[1]), row, -1.0)
+            best = int(np.argmax(row))
+            scored.append((float(row[best]), best if row[best] > -1.0 else None))
+        return scored
+
+    def decide(self, score: float) -> Optional[bool]:
+        # True: clearly disclosed, False: clearly not, None: ambiguous, ask the LLM
+        if score >= self.hit_threshold:
+            return True
+        if score < self.miss_threshold:
+            return False
+        return None
+
+    def describe(self, transcript: str, disclosed: bool, score: float, window: Optional[int]) -> str:
+        index = index_transcript(transcript)
+        where = ""
+        if window is not None and len(index):
+            first, last = self._windows(transcript)[1][window]
+            where = f" at [{index.timestamp(first)}]-[{index.timestamp(last)}]"
+        if disclosed:
+            return (f"Yes\nJustification: the transcript{where} closely matches the risk scenario script "
+                    f"(embedding similarity {score:.2f}).")
+        return (f"No\nJustification: no part of the transcript is close to the risk scenario script "
+                f"(best embedding similarity {score:.2f}{where}).")
+
+
+_matcher: Optional[DisclosureMatcher] = None
+_matcher_lock = threading.Lock()
+
+
+def get_disclosure_matcher() -> DisclosureMatcher:
+    global _matcher
+    with _matcher_lock:
+        if _matcher is None:
+            _matcher = DisclosureMatcher()
+        return _matcher
@@ -0,0 +1,183 @@
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from metrics import metrics, estimate_tokens
+from model_backends import get_model
+
+# ========== CONFIG ==========
+MAX_BATCH_SIZE = 250        # texts per provider request (Vertex AI text embeddings accept up to 250)
+MAX_BATCH_TOKENS = 15000    # estimated tokens per request; Vertex AI caps a request at 20k, estimates are rough
+MAX_CONCURRENT_BATCHES = 4  # provider requests in flight per client
+COALESCE_SECONDS = 0.005    # how long a partial batch waits for texts from other callers
+CACHE_SIZE = 10000          # embedded texts kept per client (LRU)
+
+
+def _request(model: Any, texts: List[str]) -> List[Sequence[float]]:
+    # vertexai TextEmbeddingModel.get_embeddings returns objects with .values,
+    # langchain Embeddings.embed_documents returns plain lists
+    if hasattr(model, "get_embeddings"):
+        return [getattr(vector, "values", vector) for vector in model.get_embeddings(texts)]
+    return model.embed_documents(texts)
+
+
+# ========== CLIENT ==========
+class EmbeddingClient:
+    # Embeds texts for any number of threads through one model client:
+    #  - identical texts are embedded once, within a call and across calls (LRU cache);
+    #  - texts already being embedded for another caller are waited for, not re-sent;
+    #  - while other callers are active, new texts are pooled for up to COALESCE_SECONDS and
+    #    sent in shared requests of at most max_batch_size texts and max_batch_tokens estimated
+    #    tokens (a longer single text goes alone), several requests at a time.
+    def __init__(
+        self,
+        kind: str = "text_embedding",
+        model_name: Optional[str] = None,
+        model: Any = None,
+        max_batch_size: int = MAX_BATCH_SIZE,
+        max_batch_tokens: int = MAX_BATCH_TOKENS,
+        max_concurrent_batches: int = MAX_CONCURRENT_BATCHES,
+        coalesce_seconds: float = COALESCE_SECONDS,
+        cache_size: int = CACHE_SIZE,
+    ):
+        self.kind = kind
+        self.model_name = model_name
+        self._model = model
+        self.max_batch_size = max_batch_size
+        self.max_batch_tokens = max_batch_tokens
+        self.max_concurrent_batches = max_concurrent_batches
+        self.coalesce_seconds = coalesce_seconds
+        self.cache_size = cache_size
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._cache_model: Any = None
+        self._inflight: Dict[str, Future] = {}
+        self._pending: List[str] = []
+        self._flush_scheduled = False
+        self._callers = 0
+        self._pool: Optional[ThreadPoolExecutor] = None
+
+    @property
+    def model(self) -> Any:
+        return self._model or get_model(self.kind, self.model_name)
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        # Returns a C-contiguous float32 matrix with one row per input text, in input order
+        texts = list(texts)
+        if not texts:
+            return np.zeros((0, 0), dtype=np.float32)
+        model = self.model
+        rows: Dict[str, np.ndarray] = {}
+        waiting: Dict[str, Future] = {}
+        with self._lock:
+            self._callers += 1
+            if model is not self._cache_model:
+                # vectors from another model (e.g. after use_backend) are not comparable
+                self._cache.clear()
+                self._cache_model = model
+            for text in dict.fromkeys(texts):
+                row = self._cache.get(text)
+                if row is not None:
+                    self._cache.move_to_end(text)
+                    rows[text] = row
+                elif text in self._inflight:
+                    waiting[text] = self._inflight[text]
+                else:
+                    waiting[text] = self._inflight[text] = Future()
+                    self._pending.append(text)
+            full_batches = self._take_full_batches()
+            lead = bool(self._pending) and not self._flush_scheduled
+            if lead:
+                self._flush_scheduled = True
+            alone = self._callers == 1
+        metrics.count("cache_requests", len(rows), cache="embeddings", result="hit")
+        metrics.count("cache_requests", len(waiting), cache="embeddings", result="miss")
+
+        try:
+            for batch in full_batches:
+                self._submit(model, batch)
+            if lead:
+                if not alone:
+                    # First caller with a partial batch: give the other callers a moment to add to it
+                    time.sleep(self.coalesce_seconds)
+                with self._lock:
+                    pending, self._pending = self._pending, []
+                    self._flush_scheduled = False
+                for batch in self._batches(pending):
+                    self._submit(model, batch)
+            for text, future in waiting.items():
+                rows[text] = future.result()
+        finally:
+            with self._lock:
+                self._callers -= 1
+        return np.ascontiguousarray(np.stack([rows[text] for text in texts]), dtype=np.float32)
+
+    def _batches(self, texts: List[str]) -> List[List[str]]:
+        # Consecutive runs of texts within both the text and the token limit
+        batches: List[List[str]] = []
+        batch: List[str] = []
+        tokens = 0
+        for text in texts:
+            size = estimate_tokens(text)
+            if batch and (len(batch) == self.max_batch_size or tokens + size > self.max_batch_tokens):
+                batches.append(batch)
+                batch, tokens = [], 0
+            batch.append(text)
+            tokens += size
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def _take_full_batches(self) -> List[List[str]]:
+        # Caller holds self._lock. Every batch but the last is full; the last stays pending.
+        batches = self._batches(self._pending)
+        self._pending = batches.pop() if batches else []
+        return batches
+
+    def _submit(self, model: Any, batch: List[str]) -> None:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(self.max_concurrent_batches, thread_name_prefix="embedding")
+        self._pool.submit(self._run_batch, model, batch)
+
+    def _run_batch(self, model: Any, batch: List[str]) -> None:
+        try:
+            with metrics.timer("embedding_latency_seconds", model=self.model_name):
+                matrix = np.asarray(_request(model, batch), dtype=np.float32)
+            if matrix.ndim != 2 or matrix.shape[0] != len(batch):
+                raise ValueError(f"Expected {len(batch)} embeddings, got array of shape {matrix.shape}")
+        except BaseException as e:
+            with self._lock:
+                futures = [self._inflight.pop(text) for text in batch]
+            for future in futures:
+                future.set_exception(e)
+            return
+        metrics.count("embedding_requests", model=self.model_name)
+        metrics.count("embedded_texts", len(batch), model=self.model_name)
+        with self._lock:
+            futures = [self._inflight.pop(text) for text in batch]
+            if model is self._cache_model:
+                for text, row in zip(batch, matrix):
+                    self._cache[text] = row
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        for future, row in zip(futures, matrix):
+            future.set_result(row)
+
+
+_clients: Dict[Tuple[str, Optional[str]], EmbeddingClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_embedding_client(kind: str = "text_embedding", model_name: Optional[str] = None, **options: Any) -> EmbeddingClient:
+    # Shared per (kind, model name) so every caller in the process coalesces into the same
+    # batches; options (EmbeddingClient arguments) only apply when the client is first built.
+    with _clients_lock:
+        client = _clients.get((kind, model_name))
+        if client is None:
+            client = _clients[(kind, model_name)] = EmbeddingClient(kind, model_name, **options)
+        return client
@@ -1,15 +1,72 @@
-import os
-from typing import List, Dict, Any
+import json
+import time
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, List, Dict, Any, Optional, Callable, Tuple
 from pydantic import BaseModel, Field
-from langchain.chat_models import ChatOpenAI
-from langchain.prompts import PromptTemplate
-from langchain.output_parsers import StructuredOutputParser, ResponseSchema
-from langchain.chains import LLMChain
-from langchain_core.runnables import RunnableLambda, RunnableMap, RunnableSequence
+from checklist_registry import CHECKLIST_FOLDER, get_registry
+from transcript_index import index_transcript, relevant_excerpt, relevant_window
+from metrics import metrics, estimate_tokens
+from model_backends import get_model
 
-# Initialize the LLM
-temperature = 0
-llm = ChatOpenAI(temperature=temperature)
+if TYPE_CHECKING:
+    from langchain.chains import LLMChain
+    from disclosure_matcher import DisclosureMatcher
+
+log = logging.getLogger(__name__)
+
+temperature = 0  # applied when the LLM client is first built
+
+# Upper bound on per-entity LLM checks in flight for a single transcript
+MAX_PARALLEL_CHECKS = 8
+
+# Decide clear disclosure hits/misses with embeddings before asking the LLM
+DISCLOSURE_FAST_PATH = True
+
+# Pack several products' checks into one structured request instead of one call each
+BATCHED_CHECKS = False
+BATCH_TOKEN_BUDGET = 6000      # target prompt size for one batched request
+CONTEXT_TOKEN_LIMIT = 12000    # hard limit; larger batches are split before sending
+RESPONSE_TOKENS_PER_ITEM = 120
+
+# Process-wide cap on concurrent LLM requests, shared by every pipeline run in this process
+LLM_CONCURRENCY = 16
+_llm_slots = threading.BoundedSemaphore(LLM_CONCURRENCY)
+
+
+def set_llm_concurrency(limit: int) -> None:
+    global _llm_slots
+    _llm_slots = threading.BoundedSemaphore(limit)
+
+
+# The LLM is built on first use; langchain is only imported once a chain is needed
+def get_llm() -> Any:
+    return get_model("llm", temperature=temperature)
+
+
+def make_chain(template: str, input_variables: List[str], partial_variables: Optional[Dict[str, Any]] = None) -> "LLMChain":
+    from langchain.prompts import PromptTemplate
+    from langchain.chains import LLMChain
+
+    prompt = PromptTemplate(input_variables=input_variables, template=template, partial_variables=partial_variables or {})
+    return LLMChain(llm=get_llm(), prompt=prompt)
+
+
+def run_chain(chain: "LLMChain", **inputs: Any) -> str:
+    queued = time.perf_counter()
+    with _llm_slots:
+        started = time.perf_counter()
+        output = chain.run(**inputs)
+    if metrics.enabled:
+        metrics.observe("llm_queue_seconds", started - queued)
+        metrics.record_llm_call(
+            getattr(chain.llm, "model_name", type(chain.llm).__name__),
+            time.perf_counter() - started,
+            chain.prompt.format(**inputs),
+            str(output),
+        )
+    return output
 
 # ========== ENTITY SCHEMA FOR OUTPUT PARSER ==========
 class ProductEntity(BaseModel):
@@ -24,6 +81,8 @@ class ProductEntity(BaseModel):
 
 # ========== 1. ENTITY EXTRACTION ==========
 def extract_entities(transcript: str, product_types: List[str]) -> List[Dict[str, Any]]:
+    from langchain.output_parsers import StructuredOutputParser, ResponseSchema
+
     parser = StructuredOutputParser.from_response_schemas([
         ResponseSchema(name="product_name", description="Name of the product"),
         ResponseSchema(name="product_type", description="Type of product (must match provided list)"),
@@ -56,14 +115,8 @@ def extract_entities(transcript: str, product_types: List[str]) -> List[Dict[str
     {transcript}
     """
 
-    prompt = PromptTemplate(
-        input_variables=["transcript", "product_types"],
-        template=template,
-        partial_variables={"format_instructions": format_instructions},
-    )
-
-    chain = LLMChain(llm=llm, prompt=prompt)
-    raw_output = chain.run(transcript=transcript, product_types=", ".join(product_types))
+    chain = make_chain(template, ["transcript", "product_types"], {"format_instructions": format_instructions})
+    raw_output = run_chain(chain, transcript=transcript, product_types=", ".join(product_types))
 
     try:
         parsed_output = parser.parse(raw_output)
@@ -73,13 +126,22 @@ def extract_entities(transcript: str, product_types: List[str]) -> List[Dict[str
 
 
 # ========== 2. ORDER TAKING CHECKLIST ==========
-def check_order_taking(transcript: str, product_type: str, checklist_folder: str = "products_checklist") -> Dict[str, Any]:
-    checklist_path = os.path.join(checklist_folder, f"{product_type}.txt")
-    if not os.path.exists(checklist_path):
+def mention_terms(product_type: str, entities: List[Dict[str, Any]], checklist_folder: str = CHECKLIST_FOLDER) -> List[str]:
+    # Names the transcript may use for a product type: the type, its registry aliases
+    # and the product names extracted for it.
+    names = get_registry(checklist_folder).names_for(product_type)
+    names += [e["product_name"] for e in entities if e.get("product_type") == product_type and e.get("product_name")]
+    return names
+
+
+def check_order_taking(transcript: str, product_type: str, checklist_folder: str = CHECKLIST_FOLDER, terms: Optional[List[str]] = None) -> Dict[str, Any]:
+    registry = get_registry(checklist_folder)
+    checklist = registry.get_checklist(product_type)
+    if checklist is None:
         return {"status": "error", "message": f"Checklist not found for {product_type}"}
 
-    with open(checklist_path, 'r') as f:
-        checklist = f.read()
+    # Only the part of the call where this product is discussed goes into the prompt.
+    transcript = relevant_excerpt(transcript, terms or registry.names_for(product_type))
 
     template = """
     You are a compliance assistant. Check whether the RM in the below transcript has followed all the points in the checklist for the product type: {product_type}.
@@ -95,71 +157,353 @@ def check_order_taking(transcript: str, product_type: str, checklist_folder: str
     - Pass/Fail flag
     - Reasons for failure (if any)
     """
-    prompt = PromptTemplate(
-        input_variables=["transcript", "product_type", "checklist"],
-        template=template,
-    )
-    chain = LLMChain(llm=llm, prompt=prompt)
-    result = chain.run(transcript=transcript, product_type=product_type, checklist=checklist)
+    chain = make_chain(template, ["transcript", "product_type", "checklist"])
+    result = run_chain(chain, transcript=transcript, product_type=product_type, checklist=checklist)
     return {"product_type": product_type, "check_result": result}
 
 
 # ========== 3. SALES SUITABILITY CHECKLIST ==========
-def check_sales_suitability(transcript: str, entities: List[Dict[str, Any]], risk_scenarios: Dict[str, str]) -> List[Dict[str, Any]]:
-    results = []
+def check_risk_scenario(transcript: str, product_type: str, scenario_script: str, terms: Optional[List[str]] = None) -> Dict[str, Any]:
+    transcript = relevant_excerpt(transcript, terms or [product_type])
+    template = """
+    Check whether the following risk scenario script was properly communicated by the RM in the transcript.
+    
+    Risk Scenario for {product_type}:
+    {scenario_script}
+
+    Transcript:
+    {transcript}
+
+    Result:
+    - Did the RM disclose this risk scenario?
+    - Yes/No
+    - Justification
+    """
+    chain = make_chain(template, ["transcript", "product_type", "scenario_script"])
+    result = run_chain(chain, transcript=transcript, product_type=product_type, scenario_script=scenario_script)
+    return {"product_type": product_type, "suitability_result": result}
+
+
+def plan_sales_suitability(
+    transcript: str,
+    entities: List[Dict[str, Any]],
+    risk_scenarios: Optional[Dict[str, str]] = None,
+    matcher: Optional["DisclosureMatcher"] = None,
+) -> Tuple[List[Tuple[str, str]], Dict[Tuple[str, str], List[str]], Dict[Tuple[str, str], Dict[str, Any]], List[Tuple[str, str]]]:
+    # Returns (per-entity checks, mention terms per check, results decided without the LLM,
+    # distinct checks that still need the LLM).
+    # Without an explicit risk_scenarios mapping, scenarios come from the preloaded registry.
+    registry = get_registry() if risk_scenarios is None else None
+    checks = []
     for entity in entities:
         product_type = entity.get("product_type")
-        scenario_script = risk_scenarios.get(product_type)
-        if not scenario_script:
-            continue
+        if registry is not None:
+            scenario_script = registry.get_risk_scenario(product_type) if product_type else None
+        else:
+            scenario_script = risk_scenarios.get(product_type)
+        if scenario_script:
+            checks.append((product_type, scenario_script))
 
-        template = """
-        Check whether the following risk scenario script was properly communicated by the RM in the transcript.
-        
-        Risk Scenario for {product_type}:
-        {scenario_script}
-
-        Transcript:
-        {transcript}
-
-        Result:
-        - Did the RM disclose this risk scenario?
-        - Yes/No
-        - Justification
-        """
-        prompt = PromptTemplate(
-            input_variables=["transcript", "product_type", "scenario_script"],
-            template=template,
-        )
-        chain = LLMChain(llm=llm, prompt=prompt)
-        result = chain.run(transcript=transcript, product_type=product_type, scenario_script=scenario_script)
-        results.append({"product_type": product_type, "suitability_result": result})
+    unique = list(dict.fromkeys(checks))
+    terms = {check: mention_terms(check[0], entities) for check in unique}
+
+    # Embedding fast path: clear hits and clear misses are decided locally, only the
+    # ambiguous band goes to the LLM.
+    results: Dict[Tuple[str, str], Dict[str, Any]] = {}
+    ambiguous = unique
+    if DISCLOSURE_FAST_PATH and unique:
+        from disclosure_matcher import get_disclosure_matcher  # numpy is only needed on this path
+        matcher = matcher or get_disclosure_matcher()
+        try:
+            windows = [relevant_window(transcript, terms[check]) for check in unique]
+            scores = matcher.score(transcript, [(check[1], window) for check, window in zip(unique, windows)])
+        except Exception as e:
+            log.warning(f"⚠️ Disclosure fast path unavailable, using the LLM for every check: {type(e).__name__}: {e}")
+            metrics.count("disclosure_fast_path_errors")
+            scores = None
+        if scores is not None:
+            ambiguous = []
+            for check, (score, window) in zip(unique, scores):
+                disclosed = matcher.decide(score)
+                metrics.count("disclosure_decisions", decision={True: "hit", False: "miss", None: "llm"}[disclosed])
+                if disclosed is None:
+                    ambiguous.append(check)
+                else:
+                    results[check] = {
+                        "product_type": check[0],
+                        "suitability_result": matcher.describe(transcript, disclosed, score, window),
+                    }
+    return checks, terms, results, ambiguous
+
+
+def check_sales_suitability(
+    transcript: str,
+    entities: List[Dict[str, Any]],
+    risk_scenarios: Optional[Dict[str, str]] = None,
+    matcher: Optional["DisclosureMatcher"] = None,
+) -> List[Dict[str, Any]]:
+    checks, terms, results, ambiguous = plan_sales_suitability(transcript, entities, risk_scenarios, matcher)
+
+    # One LLM call per remaining distinct (product_type, scenario), all in flight at once.
+    results.update(zip(ambiguous, fan_out(
+        lambda check: check_risk_scenario(transcript, *check, terms=terms[check]), ambiguous
+    )))
+    return [dict(results[check]) for check in checks]
+
+
+# ========== 4. BATCHED MULTI-PRODUCT CHECKS ==========
+BATCHED_TEMPLATE = """
+    You are a compliance assistant. Review the transcript below against every numbered item.
+    ORDER_TAKING items are checklists the RM must follow for a product type.
+    RISK_SCENARIO items are risk scenario scripts the RM must communicate for a product type.
+
+    Items:
+    {items}
+
+    Transcript:
+    {transcript}
+
+    Respond with only a JSON array containing one object per item, in this form:
+    [{{"id": "<item id>", "passed": true or false, "summary": "<one or two sentences>", "reasons": "<reasons for failure, or empty>"}}]
+    For ORDER_TAKING, passed means the checklist was followed. For RISK_SCENARIO, passed means the risk was disclosed.
+    """
+
+
+def _render_items(items: List[Dict[str, Any]]) -> str:
+    return "\n\n".join(
+        f"[id: {item['id']}] {item['kind'].upper()} for product type {item['product_type']}:\n{item['criteria']}"
+        for item in items
+    )
+
+
+def _batch_transcript(transcript: str, items: List[Dict[str, Any]]) -> str:
+    # The union of every item's discussion window, or the whole call if any item has none.
+    windows = [relevant_window(transcript, item["terms"]) for item in items]
+    if not windows or any(window is None for window in windows):
+        return transcript
+    return index_transcript(transcript).excerpt(min(w[0] for w in windows), max(w[1] for w in windows))
+
+
+def _batch_tokens(transcript: str, items: List[Dict[str, Any]]) -> int:
+    return (
+        estimate_tokens(BATCHED_TEMPLATE)
+        + estimate_tokens(_batch_transcript(transcript, items))
+        + sum(estimate_tokens(item["criteria"]) + RESPONSE_TOKENS_PER_ITEM for item in items)
+    )
+
+
+def pack_batches(transcript: str, items: List[Dict[str, Any]], token_budget: int = BATCH_TOKEN_BUDGET) -> List[List[Dict[str, Any]]]:
+    # Greedy packing in item order; an item that alone exceeds the budget gets its own batch.
+    batches: List[List[Dict[str, Any]]] = []
+    current: List[Dict[str, Any]] = []
+    for item in items:
+        if current and _batch_tokens(transcript, current + [item]) > token_budget:
+            batches.append(current)
+            current = []
+        current.append(item)
+    if current:
+        batches.append(current)
+    return batches
 
+
+def _parse_verdicts(raw_output: str) -> Dict[str, Dict[str, Any]]:
+    text = raw_output.strip()
+    start, end = text.find("["), text.rfind("]")
+    if start < 0 or end < start:
+        raise ValueError("no JSON array in batched response")
+    verdicts = json.loads(text[start:end + 1])
+    # Entries without an id or a true/false verdict are left out, so their items get checked on their own
+    parsed = {}
+    for v in verdicts:
+        if isinstance(v, dict) and "id" in v:
+            passed = _parse_passed(v.get("passed"))
+            if passed is not None:
+                parsed[str(v["id"])] = dict(v, passed=passed)
+    return parsed
+
+
+def _parse_passed(value: Any) -> Optional[bool]:
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str) and value.strip().lower() in ("true", "false"):
+        return value.strip().lower() == "true"
+    return None
+
+
+def _to_result(item: Dict[str, Any], verdict: Dict[str, Any]) -> Dict[str, Any]:
+    passed = verdict["passed"]
+    summary = verdict.get("summary", "")
+    reasons = verdict.get("reasons", "")
+    if item["kind"] == "order_taking":
+        text = f"Checklist followed: {'Yes' if passed else 'No'}\nPass/Fail: {'Pass' if passed else 'Fail'}\n{summary}"
+        if reasons and not passed:
+            text += f"\nReasons for failure: {reasons}"
+        return {"product_type": item["product_type"], "check_result": text}
+    text = f"{'Yes' if passed else 'No'}\nJustification: {summary}"
+    if reasons and not passed:
+        text += f" {reasons}"
+    return {"product_type": item["product_type"], "suitability_result": text}
+
+
+def _check_single(transcript: str, item: Dict[str, Any]) -> Dict[str, Any]:
+    if item["kind"] == "order_taking":
+        return check_order_taking(transcript, item["product_type"], terms=item["terms"])
+    return check_risk_scenario(transcript, item["product_type"], item["criteria"], terms=item["terms"])
+
+
+def _run_batch(transcript: str, items: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    if len(items) == 1:
+        return {items[0]["id"]: _check_single(transcript, items[0])}
+    if _batch_tokens(transcript, items) > CONTEXT_TOKEN_LIMIT:
+        return _split_batch(transcript, items)
+
+    chain = make_chain(BATCHED_TEMPLATE, ["transcript", "items"])
+    try:
+        raw_output = run_chain(chain, transcript=_batch_transcript(transcript, items), items=_render_items(items))
+    except Exception as e:
+        if "context length" in str(e).lower() or "maximum context" in str(e).lower():
+            return _split_batch(transcript, items)
+        raise
+
+    try:
+        verdicts = _parse_verdicts(raw_output)
+    except (ValueError, TypeError) as e:
+        log.warning(f"⚠️ Could not parse batched verdicts ({e}); splitting batch of {len(items)}")
+        return _split_batch(transcript, items)
+
+    results = {item["id"]: _to_result(item, verdicts[item["id"]]) for item in items if item["id"] in verdicts}
+    missing = [item for item in items if item["id"] not in verdicts]
+    # Items the model skipped are checked on their own.
+    results.update(zip([item["id"] for item in missing], fan_out(lambda item: _check_single(transcript, item), missing)))
     return results
 
 
-# ========== 4. LANGGRAPH EXECUTION SEQUENCE ==========
-def run_compliance_pipeline(transcript: str, product_types: List[str], risk_scenarios: Dict[str, str]) -> Dict[str, Any]:
-    def extract(transcript_and_types):
-        transcript, product_types = transcript_and_types["transcript"], transcript_and_types["product_types"]
-        return {"entities": extract_entities(transcript, product_types)}
+def _split_batch(transcript: str, items: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    middle = len(items) // 2
+    results: Dict[str, Dict[str, Any]] = {}
+    for half in fan_out(lambda part: _run_batch(transcript, part), [items[:middle], items[middle:]]):
+        results.update(half)
+    return results
+
+
+def check_products_batched(
+    transcript: str,
+    entities: List[Dict[str, Any]],
+    risk_scenarios: Optional[Dict[str, str]] = None,
+    checklist_folder: str = CHECKLIST_FOLDER,
+    token_budget: int = BATCH_TOKEN_BUDGET,
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    # Same results as the per-product checks, as (order_checks, suitability_checks), but
+    # several products' checklists and risk scenarios share each LLM request.
+    registry = get_registry(checklist_folder)
+    requested = [entity["product_type"] for entity in entities if "product_type" in entity]
+    order_results: Dict[str, Dict[str, Any]] = {}
+    items: List[Dict[str, Any]] = []
+    for product_type in dict.fromkeys(requested):
+        checklist = registry.get_checklist(product_type)
+        if checklist is None:
+            order_results[product_type] = {"status": "error", "message": f"Checklist not found for {product_type}"}
+            continue
+        items.append({
+            "id": f"o{len(items)}", "kind": "order_taking", "product_type": product_type,
+            "criteria": checklist, "terms": mention_terms(product_type, entities, checklist_folder),
+        })
+
+    checks, terms, suitability_results, ambiguous = plan_sales_suitability(transcript, entities, risk_scenarios)
+    risk_ids = {}
+    for check in ambiguous:
+        risk_ids[check] = f"r{len(items)}"
+        items.append({
+            "id": risk_ids[check], "kind": "risk_scenario", "product_type": check[0],
+            "criteria": check[1], "terms": terms[check],
+        })
+
+    batches = pack_batches(transcript, items, token_budget)
+    verdicts: Dict[str, Dict[str, Any]] = {}
+    for batch_results in fan_out(lambda batch: _run_batch(transcript, batch), batches):
+        verdicts.update(batch_results)
+
+    for item in items:
+        if item["kind"] == "order_taking":
+            order_results[item["product_type"]] = verdicts[item["id"]]
+    for check, item_id in risk_ids.items():
+        suitability_results[check] = verdicts[item_id]
+
+    order_checks = [dict(order_results[product_type]) for product_type in requested]
+    suitability_checks = [dict(suitability_results[check]) for check in checks]
+    return order_checks, suitability_checks
+
+
+# ========== 5. LANGGRAPH EXECUTION SEQUENCE ==========
+def fan_out(fn: Callable[[Any], Any], items: List[Any]) -> List[Any]:
+    if len(items) <= 1:
+        return [fn(item) for item in items]
+    with ThreadPoolExecutor(max_workers=min(MAX_PARALLEL_CHECKS, len(items))) as pool:
+        return list(pool.map(fn, items))
+
+
+def run_compliance_pipeline(
+    transcript: str,
+    product_types: List[str],
+    risk_scenarios: Optional[Dict[str, str]] = None,
+    batched: bool = BATCHED_CHECKS,
+) -> Dict[str, Any]:
+    from langchain_core.runnables import RunnableLambda, RunnableParallel, RunnablePassthrough
+
+    def extract(data):
+        with metrics.stage("postcall.extract"):
+            return {**data, "entities": extract_entities(data["transcript"], data["product_types"])}
 
     def check_orders(data):
+        started = time.perf_counter()
         transcript = data["transcript"]
-        entities = data["entities"]
-        order_checks = [check_order_taking(transcript, entity["product_type"]) for entity in entities if "product_type" in entity]
-        return {"order_checks": order_checks, **data}
+        requested = [entity["product_type"] for entity in data["entities"] if "product_type" in entity]
+        # Entities sharing a product_type need only one checklist call.
+        unique = list(dict.fromkeys(requested))
+        results = dict(zip(unique, fan_out(
+            lambda product_type: check_order_taking(transcript, product_type, terms=mention_terms(product_type, data["entities"])),
+            unique,
+        )))
+        seconds = time.perf_counter() - started
+        metrics.observe("stage_seconds", seconds, stage="postcall.order_checks")
+        return {"checks": [dict(results[product_type]) for product_type in requested], "seconds": seconds}
 
     def check_suitability(data):
-        return {"suitability_checks": check_sales_suitability(data["transcript"], data["entities"], data["risk_scenarios"]), **data}
-
-    pipeline = RunnableSequence(
-        steps=[
-            RunnableLambda(extract),
-            RunnableLambda(check_orders),
-            RunnableLambda(check_suitability),
-        ]
-    )
+        started = time.perf_counter()
+        checks = check_sales_suitability(data["transcript"], data["entities"], data["risk_scenarios"])
+        seconds = time.perf_counter() - started
+        metrics.observe("stage_seconds", seconds, stage="postcall.suitability_checks")
+        return {"checks": checks, "seconds": seconds}
+
+    def combine(data):
+        log.debug(f"⏱️ Branch latency: order_checks {data['order_checks']['seconds']:.2f}s, "
+                  f"suitability_checks {data['suitability_checks']['seconds']:.2f}s")
+        return {
+            **data["inputs"],
+            "order_checks": data["order_checks"]["checks"],
+            "suitability_checks": data["suitability_checks"]["checks"],
+        }
+
+    def check_batched(data):
+        started = time.perf_counter()
+        order_checks, suitability_checks = check_products_batched(data["transcript"], data["entities"], data["risk_scenarios"])
+        seconds = time.perf_counter() - started
+        metrics.observe("stage_seconds", seconds, stage="postcall.batched_checks")
+        log.debug(f"⏱️ Batched checks latency: {seconds:.2f}s")
+        return {**data, "order_checks": order_checks, "suitability_checks": suitability_checks}
 
     inputs = {"transcript": transcript, "product_types": product_types, "risk_scenarios": risk_scenarios}
-    return pipeline.invoke(inputs)
+    metrics.count("transcripts", mode="batched" if batched else "per_check")
+    metrics.count("transcript_tokens", estimate_tokens(transcript))
+    if batched:
+        with metrics.stage("postcall.total"):
+            return (RunnableLambda(extract) | RunnableLambda(check_batched)).invoke(inputs)
+
+    # Both check branches only depend on the extracted entities, so they run side by side.
+    pipeline = RunnableLambda(extract) | RunnableParallel(
+        inputs=RunnablePassthrough(),
+        order_checks=RunnableLambda(check_orders),
+        suitability_checks=RunnableLambda(check_suitability),
+    ) | RunnableLambda(combine)
+    with metrics.stage("postcall.total"):
+        return pipeline.invoke(inputs)
@@ -1,7 +1,9 @@
 from langgraph.graph import StateGraph
-from langchain_core.runnables.graph import MermaidDrawMethod
-from IPython.display import Image, display
+import argparse
+import asyncio
 import json
+import time
+from typing import Any, Dict, List, TypedDict
 
 # ✅ Step 1: Define the state
 class TranscriptState(dict):
@@ -52,21 +54,122 @@ builder.add_edge("extract_entities", "complete")
 builder.set_finish_point("complete")
 graph = builder.compile()
 
-# ✅ Step 6: Run the Graph
-initial_state = TranscriptState({"transcript": transcript})
-final_state = graph.invoke(initial_state)
+# ✅ Step 6: Generate the Mermaid Graph (remote rendering API, so only on request)
+def render_graph(path="langgraph_flow.png"):
+    from langchain_core.runnables.graph import MermaidDrawMethod
 
-# ✅ Step 7: Display Final State
-if final_state is None:
-    final_state = initial_state
+    image_bytes = graph.get_graph().draw_mermaid_png(draw_method=MermaidDrawMethod.API)
+    with open(path, "wb") as f:
+        f.write(image_bytes)
+    print(f"✅ Mermaid graph saved as '{path}'")
+    return path
 
-print("\n📦 Final Output:")
-print(json.dumps(final_state, indent=2))
 
-# ✅ Step 8: Generate and Show Mermaid Graph
-image_bytes = graph.get_graph().draw_mermaid_png(draw_method=MermaidDrawMethod.API)
-with open("langgraph_flow.png", "wb") as f:
-    f.write(image_bytes)
+# ✅ Streaming mode: utterances are pushed while the call is live
+LIVE_PRODUCTS = {
+    "FX Forward": ["fx forward"],
+    "Bonds (Secondary)": ["bonds (secondary)", "bonds", "bond"],
+}
+LIVE_DISCLOSURES = {
+    "Market Risk": ["market risk"],
+    "Liquidity Risk": ["liquidity risk"],
+}
+REQUIRED_DISCLOSURES = {
+    "FX Forward": ["Market Risk", "Liquidity Risk"],
+    "Bonds (Secondary)": ["Market Risk"],
+}
 
-print("✅ Mermaid graph saved as 'langgraph_flow.png'")
-display(Image("langgraph_flow.png"))
+
+class LiveCallState(TypedDict, total=False):
+    call_id: str
+    new_utterances: str
+    ended: bool
+    products_discussed: List[Dict[str, Any]]
+    disclosures_mentioned: List[str]
+    disclosure_mentions: Dict[str, List[str]]
+    alerts: List[Dict[str, Any]]
+
+
+def build_streaming_graph(monitor):
+    # One invocation per batch of new utterances: {"call_id", "new_utterances", "ended"}.
+    # The monitor keeps each call's state between invocations, so the node only scans
+    # the new text instead of recomputing products/disclosures from the full transcript.
+    async def ingest_utterances(state: LiveCallState) -> LiveCallState:
+        if state.get("new_utterances"):
+            await monitor.push(state["call_id"], state["new_utterances"])
+        if state.get("ended"):
+            snapshot = await monitor.end_call(state["call_id"])
+        else:
+            snapshot = monitor.open_call(state["call_id"]).snapshot()
+        return {
+            "products_discussed": snapshot["products_discussed"],
+            "disclosures_mentioned": snapshot["disclosures_mentioned"],
+            "disclosure_mentions": snapshot["disclosure_mentions"],
+            "alerts": snapshot["alerts"],
+        }
+
+    streaming_builder = StateGraph(LiveCallState)
+    streaming_builder.add_node("ingest_utterances", ingest_utterances)
+    streaming_builder.set_entry_point("ingest_utterances")
+    streaming_builder.set_finish_point("ingest_utterances")
+    return streaming_builder.compile()
+
+
+async def stream_calls(calls=1, delay=0.0):
+    # Replays the sample transcript one utterance at a time on `calls` concurrent calls
+    from live_monitor import LiveMonitor
+
+    utterances = [line for line in transcript.splitlines() if line.strip()]
+    async with LiveMonitor(LIVE_PRODUCTS, LIVE_DISCLOSURES, REQUIRED_DISCLOSURES) as monitor:
+        live_graph = build_streaming_graph(monitor)
+
+        async def run_call(call_id):
+            for line in utterances:
+                await live_graph.ainvoke({"call_id": call_id, "new_utterances": line})
+                await asyncio.sleep(delay)
+            return await live_graph.ainvoke({"call_id": call_id, "ended": True})
+
+        started = time.perf_counter()
+        final_states = await asyncio.gather(*(run_call(f"call-{i:05d}") for i in range(calls)))
+        elapsed = time.perf_counter() - started
+
+    print(f"📡 Streamed {calls * len(utterances)} utterances over {calls} calls in {elapsed:.2f}s")
+    return final_states
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the transcript flow on the sample transcript.")
+    parser.add_argument("--render-graph", action="store_true", help="Also render the flow to langgraph_flow.png")
+    parser.add_argument("--stream", action="store_true", help="Push the transcript utterance by utterance through the streaming graph")
+    parser.add_argument("--calls", type=int, default=1, help="Concurrent calls to stream (with --stream)")
+    parser.add_argument("--delay", type=float, default=0.0, help="Seconds between utterances (with --stream)")
+    args = parser.parse_args(argv)
+
+    if args.stream:
+        final_states = asyncio.run(stream_calls(args.calls, args.delay))
+        print("\n📦 Final Output (first call):")
+        print(json.dumps(final_states[0], indent=2))
+        return
+
+    # ✅ Step 7: Run the Graph
+    initial_state = TranscriptState({"transcript": transcript})
+    final_state = graph.invoke(initial_state)
+
+    # ✅ Step 8: Display Final State
+    if final_state is None:
+        final_state = initial_state
+
+    print("\n📦 Final Output:")
+    print(json.dumps(final_state, indent=2))
+
+    if args.render_graph:
+        path = render_graph()
+        try:
+            from IPython.display import Image, display
+        except ImportError:
+            return
+        display(Image(path))
+
+
+if __name__ == "__main__":
+    main()
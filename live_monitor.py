@@ -0,0 +1,237 @@
+import time
+import asyncio
+import inspect
+import logging
+from bisect import bisect_left
+from typing import Any, Callable, Dict, Iterable, List, Optional, Union
+
+from transcript_index import PADDING_SECONDS, UTTERANCE_PATTERN, MentionScanner, format_timestamp, utterance_seconds
+
+log = logging.getLogger(__name__)
+
+# ========== CONFIG ==========
+WINDOW_CLOSE_SECONDS = 45     # a product's discussion closes after this much call time without a mention
+SWEEP_INTERVAL_SECONDS = 1.0  # how often silent calls are checked for windows that have closed
+# A missing-disclosure alert therefore fires at most WINDOW_CLOSE_SECONDS + SWEEP_INTERVAL_SECONDS
+# after the product's last mention, whether or not the call keeps talking.
+
+Alert = Dict[str, Any]
+
+
+# ========== ONE CALL ==========
+class CallTracker:
+    # products_discussed / disclosures_mentioned for one live call, kept in the same shape
+    # as langgraph_code.extract_entities_node and updated from each new utterance only.
+    def __init__(
+        self,
+        call_id: str,
+        product_scanner: MentionScanner,
+        disclosure_scanner: MentionScanner,
+        required: Dict[str, List[str]],
+        close_after: float = WINDOW_CLOSE_SECONDS,
+        lookback: float = PADDING_SECONDS,
+    ):
+        self.call_id = call_id
+        self.product_scanner = product_scanner
+        self.disclosure_scanner = disclosure_scanner
+        self.required = required        # product label -> disclosure labels it needs
+        self.close_after = close_after
+        self.lookback = lookback        # disclosures this long before the first mention still count
+        self.clock = 0                  # call time (seconds) of the latest utterance
+        self.updated_at = time.monotonic()
+        self.utterances = 0
+        self.products_discussed: List[Dict[str, Any]] = []
+        self.disclosures_mentioned: List[str] = []
+        self.disclosure_mentions: Dict[str, List[str]] = {}
+        self.alerts: List[Alert] = []
+        self.next_deadline: Optional[float] = None  # call time at which the earliest open window closes
+        self._products: Dict[str, Dict[str, Any]] = {}
+        self._disclosure_seconds: Dict[str, List[int]] = {}
+        self._open: Dict[str, List[int]] = {}       # product label -> [window start, last mention]
+
+    def push(self, lines: Union[str, Iterable[str]]) -> List[Alert]:
+        # "[mm:ss] Speaker: text" lines in arrival order; lines without a timestamp continue
+        # the previous utterance. Returns alerts for windows that closed meanwhile.
+        if isinstance(lines, str):
+            lines = lines.splitlines()
+        alerts: List[Alert] = []
+        for line in lines:
+            match = UTTERANCE_PATTERN.match(line)
+            if match:
+                self.clock = max(self.clock, utterance_seconds(*match.group(1, 2, 3)))
+                self.utterances += 1
+                text = match.group(5)
+                # Close first, so a mention after a long gap opens a new window
+                alerts += self.close_expired(self.clock)
+            elif line.strip() and self.utterances:
+                text = line
+            else:
+                continue
+            self._scan(text)
+        self.updated_at = time.monotonic()
+        return alerts
+
+    def _scan(self, text: str) -> None:
+        timestamp = format_timestamp(self.clock)
+        for label in self.product_scanner.labels_in(text):
+            entry = self._products.get(label)
+            if entry is None:
+                entry = self._products[label] = {"name": label, "start_time": timestamp, "end_time": timestamp, "mentions": []}
+                self.products_discussed.append(entry)
+            entry["end_time"] = timestamp
+            if not entry["mentions"] or entry["mentions"][-1] != timestamp:
+                entry["mentions"].append(timestamp)
+            self._open.setdefault(label, [self.clock, self.clock])[1] = self.clock
+        for label in self.disclosure_scanner.labels_in(text):
+            if label not in self.disclosure_mentions:
+                self.disclosures_mentioned.append(label)
+                self.disclosure_mentions[label] = []
+                self._disclosure_seconds[label] = []
+            if not self._disclosure_seconds[label] or self._disclosure_seconds[label][-1] != self.clock:
+                self.disclosure_mentions[label].append(timestamp)
+                self._disclosure_seconds[label].append(self.clock)
+        self._update_deadline()
+
+    def _update_deadline(self) -> None:
+        self.next_deadline = min(last for _, last in self._open.values()) + self.close_after if self._open else None
+
+    def close_expired(self, now: float) -> List[Alert]:
+        # Closes every window whose last mention is more than close_after before `now`
+        # (call seconds) and checks its required disclosures.
+        if self.next_deadline is None or now <= self.next_deadline:
+            return []
+        alerts = []
+        for label, (start, last) in list(self._open.items()):
+            if now > last + self.close_after:
+                del self._open[label]
+                alert = self._check(label, start, last, now)
+                if alert is not None:
+                    alerts.append(alert)
+        self._update_deadline()
+        self.alerts.extend(alerts)
+        return alerts
+
+    def _check(self, label: str, start: int, last: int, now: float) -> Optional[Alert]:
+        low, high = start - self.lookback, last + self.close_after
+        missing = []
+        for disclosure in self.required.get(label, ()):
+            seconds = self._disclosure_seconds.get(disclosure, [])
+            i = bisect_left(seconds, low)
+            if i == len(seconds) or seconds[i] > high:
+                missing.append(disclosure)
+        if not missing:
+            return None
+        return {
+            "call_id": self.call_id,
+            "product": label,
+            "missing_disclosures": missing,
+            "window_start": format_timestamp(start),
+            "window_end": format_timestamp(last),
+            "raised_at": format_timestamp(self.clock if now == float("inf") else int(now)),
+        }
+
+    def finish(self) -> List[Alert]:
+        return self.close_expired(float("inf"))
+
+    def snapshot(self) -> Dict[str, Any]:
+        # Live views, not copies: read them, don't modify them
+        return {
+            "call_id": self.call_id,
+            "products_discussed": self.products_discussed,
+            "disclosures_mentioned": self.disclosures_mentioned,
+            "disclosure_mentions": self.disclosure_mentions,
+            "open_products": list(self._open),
+            "alerts": self.alerts,
+        }
+
+
+# ========== MANY CALLS ==========
+class LiveMonitor:
+    # Tracks any number of concurrent calls on one event loop. The mention scanners are
+    # compiled once and shared by every call; each push only scans the new utterances.
+    def __init__(
+        self,
+        products: Dict[str, Iterable[str]],
+        disclosures: Dict[str, Iterable[str]],
+        required: Dict[str, List[str]],
+        close_after: float = WINDOW_CLOSE_SECONDS,
+        sweep_interval: float = SWEEP_INTERVAL_SECONDS,
+        on_alert: Optional[Callable[[Alert], Any]] = None,
+    ):
+        self.product_scanner = MentionScanner(products)
+        self.disclosure_scanner = MentionScanner(disclosures)
+        self.required = required
+        self.close_after = close_after
+        self.sweep_interval = sweep_interval
+        self.on_alert = on_alert or (lambda alert: log.warning(
+            f"🚨 {alert['call_id']}: {alert['product']} discussed {alert['window_start']}-{alert['window_end']} "
+            f"without {', '.join(alert['missing_disclosures'])}"
+        ))
+        self.calls: Dict[str, CallTracker] = {}
+        self._sweeper: Optional[asyncio.Task] = None
+
+    def open_call(self, call_id: str) -> CallTracker:
+        tracker = self.calls.get(call_id)
+        if tracker is None:
+            tracker = self.calls[call_id] = CallTracker(
+                call_id, self.product_scanner, self.disclosure_scanner, self.required, self.close_after
+            )
+        return tracker
+
+    async def push(self, call_id: str, lines: Union[str, Iterable[str]]) -> List[Alert]:
+        alerts = self.open_call(call_id).push(lines)
+        await self._deliver(alerts)
+        return alerts
+
+    async def end_call(self, call_id: str) -> Dict[str, Any]:
+        tracker = self.open_call(call_id)
+        del self.calls[call_id]
+        await self._deliver(tracker.finish())
+        return tracker.snapshot()
+
+    async def sweep(self) -> List[Alert]:
+        # Silent calls: advance each call's clock by the wall time since its last utterance
+        now = time.monotonic()
+        alerts: List[Alert] = []
+        for tracker in list(self.calls.values()):
+            if tracker.next_deadline is None:
+                continue
+            call_now = tracker.clock + (now - tracker.updated_at)
+            if call_now > tracker.next_deadline:
+                alerts += tracker.close_expired(call_now)
+        await self._deliver(alerts)
+        return alerts
+
+    async def _deliver(self, alerts: List[Alert]) -> None:
+        for alert in alerts:
+            result = self.on_alert(alert)
+            if inspect.isawaitable(result):
+                await result
+
+    async def _sweep_forever(self) -> None:
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            try:
+                await self.sweep()
+            except Exception as e:
+                log.warning(f"⚠️ Live monitor sweep failed: {type(e).__name__}: {e}")
+
+    def start(self) -> None:
+        if self._sweeper is None:
+            self._sweeper = asyncio.get_running_loop().create_task(self._sweep_forever())
+
+    async def stop(self) -> None:
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            try:
+                await self._sweeper
+            except asyncio.CancelledError:
+                pass
+            self._sweeper = None
+
+    async def __aenter__(self) -> "LiveMonitor":
+        self.start()
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.stop()
@@ -0,0 +1,188 @@
+import os
+import json
+import time
+import logging
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager, nullcontext
+from typing import Any, Dict, Optional, Tuple
+
+# ========== CONFIG ==========
+METRICS_ENABLED = os.environ.get("COMPLISENSE_METRICS", "0") == "1"
+METRICS_DIR = os.environ.get("COMPLISENSE_METRICS_DIR", "run_reports")
+LOG_LEVEL = os.environ.get("COMPLISENSE_LOG_LEVEL", "INFO")
+LATENCY_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+METRIC_PREFIX = "complisense_"
+
+
+def configure_logging(level: str = LOG_LEVEL) -> None:
+    # Entry points call this; library code only ever logs.
+    logging.basicConfig(level=getattr(logging, str(level).upper(), logging.INFO), format="%(message)s")
+
+
+def estimate_tokens(text: str) -> int:
+    # ~4 characters per token is close enough for budgeting and reporting
+    return len(text) // 4 + 1
+
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+def _labels(labels: Dict[str, Any]) -> Labels:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class _Histogram:
+    __slots__ = ("buckets", "counts", "count", "sum", "max")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+
+# ========== REGISTRY ==========
+class Metrics:
+    # Every recording method returns immediately when disabled, so instrumented hot
+    # paths cost one attribute check.
+    def __init__(self, enabled: bool = METRICS_ENABLED):
+        self.enabled = enabled
+        self.reset()
+
+    def reset(self) -> None:
+        self._lock = threading.Lock()
+        self._started = time.time()
+        self._counters: Dict[Tuple[str, Labels], float] = {}
+        self._histograms: Dict[Tuple[str, Labels], _Histogram] = {}
+
+    def count(self, name: str, value: float = 1, **labels: Any) -> None:
+        if not self.enabled:
+            return
+        key = (name, _labels(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels: Any) -> None:
+        if not self.enabled:
+            return
+        key = (name, _labels(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = _Histogram(LATENCY_BUCKETS)
+            histogram.observe(value)
+
+    @contextmanager
+    def _timed(self, name: str, labels: Dict[str, Any]):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def timer(self, name: str, **labels: Any):
+        if not self.enabled:
+            return nullcontext()
+        return self._timed(name, labels)
+
+    def stage(self, stage: str):
+        # Wall time of one pipeline stage
+        return self.timer("stage_seconds", stage=stage)
+
+    def record_llm_call(self, model: str, seconds: float, prompt: str, response: str) -> None:
+        if not self.enabled:
+            return
+        self.observe("llm_latency_seconds", seconds, model=model)
+        self.count("llm_prompt_tokens", estimate_tokens(prompt), model=model)
+        self.count("llm_response_tokens", estimate_tokens(response), model=model)
+
+    # ========== EXPORT ==========
+    def report(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = dict(self._histograms)
+
+        def label_key(name: str, labels: Labels) -> str:
+            return name + ("{" + ",".join(f"{k}={v}" for k, v in labels) + "}" if labels else "")
+
+        cache_rates = {}
+        for (name, labels), value in counters.items():
+            if name != "cache_requests":
+                continue
+            cache = dict(labels).get("cache", "")
+            hits, total = cache_rates.get(cache, (0, 0))
+            cache_rates[cache] = (hits + (value if dict(labels).get("result") == "hit" else 0), total + value)
+
+        return {
+            "started_at": self._started,
+            "elapsed_seconds": round(time.time() - self._started, 3),
+            "counters": {label_key(n, l): v for (n, l), v in sorted(counters.items())},
+            "histograms": {
+                label_key(n, l): {
+                    "count": h.count,
+                    "sum": round(h.sum, 6),
+                    "mean": round(h.sum / h.count, 6) if h.count else 0.0,
+                    "max": round(h.max, 6),
+                    "buckets": dict(zip([str(b) for b in h.buckets] + ["+Inf"], h.counts)),
+                }
+                for (n, l), h in sorted(histograms.items())
+            },
+            "cache_hit_rates": {cache: round(hits / total, 4) for cache, (hits, total) in cache_rates.items() if total},
+        }
+
+    def prometheus_text(self) -> str:
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = {key: h for key, h in self._histograms.items()}
+
+        def fmt(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+            pairs = list(labels) + ([extra] if extra else [])
+            return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}" if pairs else ""
+
+        lines = []
+        for name in sorted({n for n, _ in counters}):
+            lines.append(f"# TYPE {METRIC_PREFIX}{name}_total counter")
+            for (n, labels), value in sorted(counters.items()):
+                if n == name:
+                    lines.append(f"{METRIC_PREFIX}{name}_total{fmt(labels)} {value}")
+        for name in sorted({n for n, _ in histograms}):
+            lines.append(f"# TYPE {METRIC_PREFIX}{name} histogram")
+            for (n, labels), h in sorted(histograms.items()):
+                if n != name:
+                    continue
+                cumulative = 0
+                for bound, count in zip([str(b) for b in h.buckets] + ["+Inf"], h.counts):
+                    cumulative += count
+                    lines.append(f"{METRIC_PREFIX}{name}_bucket{fmt(labels, ('le', bound))} {cumulative}")
+                lines.append(f"{METRIC_PREFIX}{name}_sum{fmt(labels)} {h.sum}")
+                lines.append(f"{METRIC_PREFIX}{name}_count{fmt(labels)} {h.count}")
+        return "\n".join(lines) + "\n"
+
+    def write_report(self, run_name: str, directory: str = METRICS_DIR) -> Optional[Tuple[str, str]]:
+        if not self.enabled:
+            return None
+        os.makedirs(directory, exist_ok=True)
+        json_path = os.path.join(directory, f"{run_name}.json")
+        prom_path = os.path.join(directory, f"{run_name}.prom")
+        with open(json_path, "w") as f:
+            json.dump(self.report(), f, indent=2)
+        with open(prom_path, "w") as f:
+            f.write(self.prometheus_text())
+        logging.getLogger(__name__).info(f"📈 Metrics written to {json_path} and {prom_path}")
+        return json_path, prom_path
+
+
+metrics = Metrics()
+
+
+def enable_metrics(enabled: bool = True) -> None:
+    metrics.enabled = enabled
@@ -0,0 +1,116 @@
+import os
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# ========== CONFIG ==========
+# "live" talks to Vertex AI / OpenAI; "fake" uses the deterministic local models in
+# stage1_ingestion.fake_models (no network, configurable latency, token accounting).
+MODEL_BACKEND = os.environ.get("COMPLISENSE_MODEL_BACKEND", "live")
+
+# The four kinds of model client the pipelines use:
+#   chat            vertexai ChatModel            (stage1_ingestion.main.get_chat_model)
+#   text_embedding  vertexai TextEmbeddingModel   (embedding_client, for product_checklist_retrival.embed)
+#   embeddings      langchain Embeddings          (embedding_client, for disclosure_matcher.DisclosureMatcher)
+#   llm             langchain chat/LLM            (example.get_llm)
+MODEL_KINDS = ("chat", "text_embedding", "embeddings", "llm")
+
+
+# ========== LIVE BACKEND ==========
+def _live_chat(model_name: str, **options: Any) -> Any:
+    from vertexai.language_models import ChatModel
+    return ChatModel.from_pretrained(model_name)
+
+
+def _live_text_embedding(model_name: str, **options: Any) -> Any:
+    from vertexai.language_models import TextEmbeddingModel
+    return TextEmbeddingModel.from_pretrained(model_name)
+
+
+def _live_embeddings(model_name: str, **options: Any) -> Any:
+    from langchain.embeddings import VertexAIEmbeddings
+    return VertexAIEmbeddings(model_name=model_name)
+
+
+def _live_llm(model_name: Optional[str] = None, **options: Any) -> Any:
+    from langchain.chat_models import ChatOpenAI
+    return ChatOpenAI(**({"model_name": model_name} if model_name else {}), **options)
+
+
+# ========== FAKE BACKEND ==========
+def _fake_chat(model_name: str, **options: Any) -> Any:
+    from stage1_ingestion.fake_models import FakeChatModel
+    return FakeChatModel(**options)
+
+
+def _fake_text_embedding(model_name: str, **options: Any) -> Any:
+    from stage1_ingestion.fake_models import FakeTextEmbeddingModel
+    return FakeTextEmbeddingModel(**options)
+
+
+def _fake_embeddings(model_name: str, **options: Any) -> Any:
+    from stage1_ingestion.fake_models import FakeEmbeddings
+    return FakeEmbeddings(**options)
+
+
+def _fake_llm(model_name: Optional[str] = None, **options: Any) -> Any:
+    from stage1_ingestion.fake_models import FakeCompletionModel, make_fake_llm
+    options.pop("temperature", None)
+    return make_fake_llm(FakeCompletionModel(**options), model_name or "fake-llm")
+
+
+_backends: Dict[str, Dict[str, Callable[..., Any]]] = {
+    "live": {"chat": _live_chat, "text_embedding": _live_text_embedding, "embeddings": _live_embeddings, "llm": _live_llm},
+    "fake": {"chat": _fake_chat, "text_embedding": _fake_text_embedding, "embeddings": _fake_embeddings, "llm": _fake_llm},
+}
+_active = MODEL_BACKEND
+_options: Dict[str, Dict[str, Any]] = {}
+_clients: Dict[Tuple[str, str, Optional[str]], Any] = {}
+_clients_lock = threading.Lock()
+
+
+def register_backend(name: str, **factories: Callable[..., Any]) -> None:
+    # factories: kind -> callable(model_name, **options); kinds left out fall back to "live"
+    unknown = set(factories) - set(MODEL_KINDS)
+    if unknown:
+        raise ValueError(f"Unknown model kinds {sorted(unknown)}, expected {MODEL_KINDS}")
+    _backends[name] = {**_backends["live"], **factories}
+
+
+def use_backend(name: str, **options: Dict[str, Any]) -> None:
+    # options: kind -> keyword arguments for that kind's factory, e.g.
+    # use_backend("fake", chat={"latency": 0.2, "responder": fn}).
+    # Clients already handed out by get_model() keep their old backend.
+    global _active, _options
+    if name not in _backends:
+        raise ValueError(f"Unknown model backend '{name}', expected one of {sorted(_backends)}")
+    with _clients_lock:
+        _active, _options = name, options
+        _clients.clear()
+
+
+def active_backend() -> str:
+    return _active
+
+
+def model_cache_key(model_name: Optional[str]) -> str:
+    # What persistent caches (LLM responses, manifests, vector indexes) key results on, so
+    # output from one backend is never reused by another. "live" keeps the bare model
+    # name so caches written before backends existed stay valid.
+    return str(model_name) if _active == "live" else f"{_active}:{model_name}"
+
+
+def create_model(kind: str, model_name: Optional[str] = None, **options: Any) -> Any:
+    if kind not in MODEL_KINDS:
+        raise ValueError(f"Unknown model kind '{kind}', expected one of {MODEL_KINDS}")
+    return _backends[_active][kind](model_name, **{**options, **_options.get(kind, {})})
+
+
+def get_model(kind: str, model_name: Optional[str] = None, **options: Any) -> Any:
+    # One client per (backend, kind, model name) for the whole process, built on first
+    # use so importing a pipeline module never loads an SDK or opens a connection.
+    # options only apply when the client is first built.
+    with _clients_lock:
+        key = (_active, kind, model_name)
+        if key not in _clients:
+            _clients[key] = create_model(kind, model_name, **options)
+        return _clients[key]
@@ -0,0 +1,4 @@
+from stage1_ingestion.main import main
+
+if __name__ == "__main__":
+    main()
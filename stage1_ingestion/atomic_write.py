@@ -0,0 +1,20 @@
+import os
+import tempfile
+
+
+def write_atomic(path, write, mode="wb"):
+    # write(f) fills a temporary file next to path, which then replaces path in one
+    # rename: readers see the old file or the complete new one, never a partial write.
+    folder = os.path.dirname(path) or "."
+    fd, tmp_path = tempfile.mkstemp(dir=folder, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, mode) as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
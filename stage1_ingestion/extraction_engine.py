@@ -0,0 +1,137 @@
+import time
+import random
+import threading
+import logging
+from collections import deque
+from functools import lru_cache
+from concurrent.futures import ThreadPoolExecutor
+
+from metrics import metrics
+
+log = logging.getLogger(__name__)
+
+# === CONFIG ===
+MAX_CONCURRENCY = 8
+REQUESTS_PER_MINUTE = 120
+MAX_RETRIES = 4
+BACKOFF_BASE_SECONDS = 1.0
+BACKOFF_MAX_SECONDS = 30.0
+
+
+@lru_cache(maxsize=None)
+def default_transient_errors():
+    # Resolved when the first engine is built, so importing this module stays cheap
+    try:
+        from google.api_core import exceptions as google_exceptions
+    except ImportError:
+        return (TimeoutError, ConnectionError)
+    return (
+        google_exceptions.ResourceExhausted,
+        google_exceptions.ServiceUnavailable,
+        google_exceptions.DeadlineExceeded,
+        google_exceptions.InternalServerError,
+        google_exceptions.TooManyRequests,
+        TimeoutError,
+        ConnectionError,
+    )
+
+_DONE = object()
+
+
+# === RATE LIMITING ===
+class TokenBucket:
+    def __init__(self, rate_per_second, capacity=None):
+        self.rate = rate_per_second
+        self.capacity = capacity if capacity is not None else max(1.0, rate_per_second)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+# === EXECUTOR ===
+class ExtractionEngine:
+    def __init__(
+        self,
+        max_concurrency=MAX_CONCURRENCY,
+        requests_per_minute=REQUESTS_PER_MINUTE,
+        max_retries=MAX_RETRIES,
+        backoff_base=BACKOFF_BASE_SECONDS,
+        backoff_max=BACKOFF_MAX_SECONDS,
+        transient_errors=None,
+    ):
+        self.max_concurrency = max_concurrency
+        self.bucket = TokenBucket(requests_per_minute / 60.0) if requests_per_minute else None
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.transient_errors = transient_errors or default_transient_errors()
+        self.retries = 0
+        self._lock = threading.Lock()
+
+    def _backoff(self, attempt):
+        delay = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        return delay * random.uniform(0.5, 1.0)
+
+    def call(self, fn, item):
+        attempt = 0
+        while True:
+            if self.bucket is not None:
+                with metrics.timer("rate_limit_wait_seconds"):
+                    self.bucket.acquire()
+            try:
+                return fn(item)
+            except self.transient_errors as e:
+                if attempt >= self.max_retries:
+                    raise
+                delay = self._backoff(attempt)
+                attempt += 1
+                with self._lock:
+                    self.retries += 1
+                metrics.count("llm_retries", error=type(e).__name__)
+                log.warning(f"⏳ Transient error ({type(e).__name__}: {e}); retry {attempt}/{self.max_retries} in {delay:.1f}s")
+                time.sleep(delay)
+
+    def run(self, fn, items, return_exceptions=False):
+        # Runs fn over items on the pool. Items are pulled lazily with at most
+        # 2 x max_concurrency in flight, so a streamed input is never fully
+        # materialised. Results come back in input order regardless of completion order.
+        results = []
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as pool:
+            pending = deque()
+            items = iter(items)
+            exhausted = False
+            while pending or not exhausted:
+                while not exhausted and len(pending) < self.max_concurrency * 2:
+                    item = next(items, _DONE)
+                    if item is _DONE:
+                        exhausted = True
+                    else:
+                        pending.append(pool.submit(fn, item))
+                if not pending:
+                    break
+                future = pending.popleft()
+                try:
+                    results.append(future.result())
+                except Exception as e:
+                    if not return_exceptions:
+                        for other in pending:
+                            other.cancel()
+                        raise
+                    results.append(e)
+        return results
+
+    def map(self, fn, items, return_exceptions=False):
+        # Like run, but every call to fn is rate limited and retried.
+        return self.run(lambda item: self.call(fn, item), items, return_exceptions)
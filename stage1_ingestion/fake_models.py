@@ -0,0 +1,169 @@
+import re
+import time
+import random
+import hashlib
+import threading
+from typing import Any
+
+from metrics import estimate_tokens
+
+# Local stand-ins for the Vertex AI and OpenAI models, used to exercise the
+# pipelines without network access. Every fake is deterministic for a given seed,
+# sleeps for a configurable latency and counts calls and (estimated) tokens.
+
+TOKEN_PATTERN = re.compile(r"\w+")
+EMBEDDING_DIMENSIONS = 256
+
+
+class _FakeBackend:
+    def __init__(self, latency=0.05, jitter=0.0, latency_per_token=0.0, failure_rate=0.0, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.latency_per_token = latency_per_token
+        self.failure_rate = failure_rate
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.response_tokens = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _wait(self, tokens):
+        # Sleeps like a remote call of `tokens` input tokens; raises an injected failure
+        # after the sleep, the way a dropped connection would.
+        with self._lock:
+            self.calls += 1
+            delay = self.latency + tokens * self.latency_per_token + self._random.uniform(0, self.jitter)
+            fail = self._random.random() < self.failure_rate
+        time.sleep(delay)
+        if fail:
+            raise ConnectionError("injected transient failure")
+
+    def _account(self, prompt_tokens, response_tokens=0):
+        with self._lock:
+            self.prompt_tokens += prompt_tokens
+            self.response_tokens += response_tokens
+
+    def usage(self):
+        with self._lock:
+            return {"calls": self.calls, "prompt_tokens": self.prompt_tokens, "response_tokens": self.response_tokens}
+
+
+# === CHAT (vertexai.language_models.ChatModel) ===
+class FakeChatResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeChatSession:
+    def __init__(self, model):
+        self.model = model
+
+    def send_message(self, prompt):
+        return self.model._respond(prompt)
+
+
+class FakeChatModel(_FakeBackend):
+    def __init__(self, latency=0.05, jitter=0.0, failure_rate=0.0, responder=None, seed=0, latency_per_token=0.0):
+        super().__init__(latency, jitter, latency_per_token, failure_rate, seed)
+        self.responder = responder or (lambda prompt: "")
+
+    def start_chat(self):
+        return FakeChatSession(self)
+
+    def _respond(self, prompt):
+        tokens = estimate_tokens(prompt)
+        self._wait(tokens)
+        text = self.responder(prompt)
+        self._account(tokens, estimate_tokens(text))
+        return FakeChatResponse(text)
+
+
+# === COMPLETION (langchain LLM used through LLMChain) ===
+class FakeCompletionModel(_FakeBackend):
+    def __init__(self, latency=0.05, jitter=0.0, failure_rate=0.0, responder=None, seed=0, latency_per_token=0.0):
+        super().__init__(latency, jitter, latency_per_token, failure_rate, seed)
+        self.responder = responder or (lambda prompt: "")
+
+    def complete(self, prompt):
+        tokens = estimate_tokens(prompt)
+        self._wait(tokens)
+        text = self.responder(prompt)
+        self._account(tokens, estimate_tokens(text))
+        return text
+
+
+def make_fake_llm(model=None, model_name="fake-llm"):
+    # Wraps a FakeCompletionModel in a langchain LLM so it can be used by LLMChain.
+    # langchain is only imported here, so the other fakes work without it.
+    from langchain.llms.base import LLM
+
+    class FakeLLM(LLM):
+        backend: Any
+        model_name: str = "fake-llm"
+
+        @property
+        def _llm_type(self):
+            return "fake"
+
+        def _call(self, prompt, stop=None, run_manager=None, **kwargs):
+            return self.backend.complete(prompt)
+
+    return FakeLLM(backend=model or FakeCompletionModel(), model_name=model_name)
+
+
+# === EMBEDDINGS ===
+def hashed_embedding(text, dimensions=EMBEDDING_DIMENSIONS):
+    # Signed feature hashing of lower-cased word tokens: texts sharing words get
+    # similar vectors, so retrieval and disclosure matching behave plausibly.
+    vector = [0.0] * dimensions
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        digest = hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest()
+        bucket = int.from_bytes(digest[:4], "little") % dimensions
+        vector[bucket] += 1.0 if digest[4] & 1 else -1.0
+    return vector
+
+
+class FakeEmbedding:
+    def __init__(self, values):
+        self.values = values
+
+
+class _FakeEmbedder(_FakeBackend):
+    def __init__(self, dimensions=EMBEDDING_DIMENSIONS, latency=0.02, jitter=0.0, latency_per_token=0.0,
+                 failure_rate=0.0, seed=0, max_batch_size=None, max_batch_tokens=None):
+        super().__init__(latency, jitter, latency_per_token, failure_rate, seed)
+        self.dimensions = dimensions
+        self.max_batch_size = max_batch_size
+        self.max_batch_tokens = max_batch_tokens
+        self.texts = 0
+
+    def _vectors(self, texts):
+        texts = list(texts)
+        if self.max_batch_size and len(texts) > self.max_batch_size:
+            raise ValueError(f"batch of {len(texts)} texts exceeds the limit of {self.max_batch_size}")
+        tokens = sum(estimate_tokens(text) for text in texts)
+        if self.max_batch_tokens and tokens > self.max_batch_tokens and len(texts) > 1:
+            raise ValueError(f"batch of {tokens} tokens exceeds the limit of {self.max_batch_tokens}")
+        self._wait(tokens)
+        self._account(tokens)
+        with self._lock:
+            self.texts += len(texts)
+        return [hashed_embedding(text, self.dimensions) for text in texts]
+
+
+class FakeTextEmbeddingModel(_FakeEmbedder):
+    # vertexai.language_models.TextEmbeddingModel shape: results carry `.values`
+    def get_embeddings(self, texts):
+        return [FakeEmbedding(values) for values in self._vectors(texts)]
+
+    def embed_documents(self, texts):
+        return self.get_embeddings(texts)
+
+
+class FakeEmbeddings(_FakeEmbedder):
+    # langchain Embeddings shape: plain lists of floats
+    def embed_documents(self, texts):
+        return self._vectors(texts)
+
+    def embed_query(self, text):
+        return self._vectors([text])[0]
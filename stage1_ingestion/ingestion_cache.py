@@ -0,0 +1,106 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+
+from model_backends import model_cache_key
+from stage1_ingestion.atomic_write import write_atomic
+
+# === CONFIG ===
+CACHE_PATH = ".ingestion_cache/llm_responses.sqlite"
+MANIFEST_DIR = ".ingestion_cache/manifests"
+MAX_CACHE_BYTES = 256 * 1024 * 1024
+
+
+def sha256_text(*parts):
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+# === LLM RESPONSE CACHE ===
+class ResponseCache:
+    def __init__(self, path=CACHE_PATH, max_bytes=MAX_CACHE_BYTES):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY, response TEXT NOT NULL, size INTEGER NOT NULL, last_used REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+        self._db.commit()
+
+    @staticmethod
+    def key(prompt, entity_type, model_name):
+        return sha256_text(model_cache_key(model_name), entity_type, prompt)
+
+    def get(self, key):
+        with self._lock:
+            row = self._db.execute("SELECT response FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._db.execute("UPDATE responses SET last_used = ? WHERE key = ?", (time.time(), key))
+            self._db.commit()
+            return row[0]
+
+    def put(self, key, response):
+        size = len(response.encode("utf-8"))
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, response, size, last_used) VALUES (?, ?, ?, ?)",
+                (key, response, size, time.time()),
+            )
+            self._evict()
+            self._db.commit()
+
+    def _evict(self):
+        total = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Drop least recently used entries until the cache fits again.
+        freed = 0
+        stale = []
+        for key, size in self._db.execute("SELECT key, size FROM responses ORDER BY last_used ASC"):
+            if total - freed <= self.max_bytes:
+                break
+            stale.append((key,))
+            freed += size
+        self._db.executemany("DELETE FROM responses WHERE key = ?", stale)
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+# === RE-INGESTION MANIFEST ===
+def manifest_path(document_path, manifest_dir=MANIFEST_DIR):
+    name = os.path.splitext(os.path.basename(document_path))[0]
+    return os.path.join(manifest_dir, f"{name}.{sha256_text(os.path.abspath(document_path))[:12]}.json")
+
+
+def load_manifest(document_path, model_name, manifest_dir=MANIFEST_DIR):
+    path = manifest_path(document_path, manifest_dir)
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r") as f:
+        manifest = json.load(f)
+    if manifest.get("model_name") != model_cache_key(model_name):
+        return {}
+    return manifest.get("chunks", {})
+
+
+def save_manifest(document_path, model_name, chunks, manifest_dir=MANIFEST_DIR):
+    os.makedirs(manifest_dir, exist_ok=True)
+    manifest = {"source": os.path.abspath(document_path), "model_name": model_cache_key(model_name), "chunks": chunks}
+    write_atomic(manifest_path(document_path, manifest_dir), lambda f: json.dump(manifest, f, default=str), mode="w")
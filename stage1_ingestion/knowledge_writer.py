@@ -0,0 +1,164 @@
+import os
+import re
+import glob
+import pickle
+import logging
+
+import yaml
+
+from stage1_ingestion.atomic_write import write_atomic
+
+log = logging.getLogger(__name__)
+
+# === CONFIG ===
+SYSTEM_CONFIG_PATH = "config/system_config.yaml"
+KNOWLEDGE_DIR = "normalized_knowledge"
+BUNDLE_NAME = "knowledge_bundle.pkl"
+BUNDLE_VERSION = 1
+MERGE_POLICIES = ("add-only", "overwrite", "conservative")
+DEFAULT_MERGE_POLICY = "add-only"
+
+
+def load_system_config(path=SYSTEM_CONFIG_PATH):
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r") as f:
+        return yaml.safe_load(f) or {}
+
+
+def normalize_name(name):
+    return re.sub(r"[^a-z0-9]+", "_", str(name).strip().lower()).strip("_") or "unknown"
+
+
+def legacy_name(name):
+    # File name used before normalize_name ("Bonds (Secondary)" -> "bonds_(secondary)")
+    return str(name).lower().replace(" ", "_")
+
+
+# === MERGING ===
+def merge_entities(existing, incoming, policy):
+    # add-only:     keep existing values, add missing keys, extend lists with new items
+    # overwrite:    incoming values replace existing ones
+    # conservative: keep existing values, add missing keys, record conflicting values
+    merged = dict(existing)
+    for key, value in incoming.items():
+        if key == "sources" or key == "_conflicts":
+            continue
+        if key not in merged or merged[key] in (None, "", [], {}):
+            merged[key] = value
+        elif merged[key] == value:
+            continue
+        elif isinstance(merged[key], dict) and isinstance(value, dict):
+            merged[key] = merge_entities(merged[key], value, policy)
+        elif policy == "overwrite":
+            merged[key] = value
+        elif policy == "add-only" and isinstance(merged[key], list) and isinstance(value, list):
+            merged[key] = merged[key] + [item for item in value if item not in merged[key]]
+        elif policy == "conservative":
+            conflict = {"field": key, "value": value}
+            if conflict not in merged.setdefault("_conflicts", []):
+                merged["_conflicts"].append(conflict)
+
+    sources = list(merged.get("sources", []))
+    for source in incoming.get("sources", []):
+        if source not in sources:
+            sources.append(source)
+    if sources:
+        merged["sources"] = sources
+    return merged
+
+
+def _with_sources(entity):
+    entity = dict(entity)
+    document = entity.pop("source_document", None)
+    pages = entity.pop("source_pages", None)
+    if document is not None or pages is not None:
+        entity["sources"] = [{"document": document, "pages": pages}]
+    return entity
+
+
+# === WRITER ===
+class KnowledgeWriter:
+    def __init__(self, knowledge_dir=KNOWLEDGE_DIR, merge_policy=None):
+        merge_policy = merge_policy or load_system_config().get("merge_policy", DEFAULT_MERGE_POLICY)
+        if merge_policy not in MERGE_POLICIES:
+            raise ValueError(f"Unknown merge_policy '{merge_policy}', expected one of {MERGE_POLICIES}")
+        self.knowledge_dir = knowledge_dir
+        self.merge_policy = merge_policy
+        self.pending = {}  # (kind, normalized name) -> merged entity
+        self.legacy_names = {}  # (kind, normalized name) -> file names under the old scheme
+
+    def add(self, kind, entity, name_key):
+        if not isinstance(entity, dict):
+            return
+        name = entity.get(name_key) or f"unknown_{kind}"
+        key = (kind, normalize_name(name))
+        if legacy_name(name) != key[1]:
+            self.legacy_names.setdefault(key, set()).add(legacy_name(name))
+        entity = _with_sources(entity)
+        if key in self.pending:
+            self.pending[key] = merge_entities(self.pending[key], entity, self.merge_policy)
+        else:
+            self.pending[key] = entity
+
+    def flush(self):
+        written = 0
+        for (kind, name), entity in self.pending.items():
+            folder = os.path.join(self.knowledge_dir, kind)
+            path = os.path.join(folder, f"{name}.yaml")
+            # Files written under the old naming scheme are merged in and then replaced
+            legacy_paths = [os.path.join(folder, f"{old}.yaml") for old in sorted(self.legacy_names.get((kind, name), ()))]
+            legacy_paths = [legacy for legacy in legacy_paths if os.path.exists(legacy)]
+            on_disk = None
+            for existing in [path] + legacy_paths:
+                if os.path.exists(existing):
+                    with open(existing, "r") as f:
+                        loaded = yaml.safe_load(f) or {}
+                    on_disk = loaded if on_disk is None else merge_entities(on_disk, loaded, self.merge_policy)
+            if on_disk is not None:
+                entity = merge_entities(on_disk, entity, self.merge_policy)
+                if entity == on_disk and not legacy_paths:
+                    continue
+            os.makedirs(folder, exist_ok=True)
+            write_yaml_atomic(path, entity)
+            for legacy in legacy_paths:
+                os.remove(legacy)
+            written += 1
+        log.info(f"✅ Wrote {written} of {len(self.pending)} knowledge files ({self.merge_policy})")
+        self.pending = {}
+        self.legacy_names = {}
+        return written
+
+    def write_bundle(self, bundle_path=None):
+        bundle_path = bundle_path or os.path.join(self.knowledge_dir, BUNDLE_NAME)
+        bundle = compile_knowledge_bundle(self.knowledge_dir)
+        os.makedirs(os.path.dirname(bundle_path) or ".", exist_ok=True)
+        write_atomic(bundle_path, lambda f: pickle.dump(bundle, f, protocol=pickle.HIGHEST_PROTOCOL))
+        log.info(f"📦 Compiled {sum(len(names) for names in bundle['index'].values())} entities → {bundle_path}")
+        return bundle_path
+
+
+# === ATOMIC WRITES ===
+def write_yaml_atomic(path, data):
+    write_atomic(path, lambda f: yaml.dump(data, f, sort_keys=False), mode="w")
+
+
+# === BUNDLE ===
+def compile_knowledge_bundle(knowledge_dir=KNOWLEDGE_DIR):
+    entities, index = {}, {}
+    for folder in sorted(glob.glob(os.path.join(knowledge_dir, "*", ""))):
+        kind = os.path.basename(os.path.dirname(folder))
+        entities[kind] = {}
+        for path in sorted(glob.glob(os.path.join(folder, "*.yaml"))):
+            with open(path, "r") as f:
+                entities[kind][os.path.splitext(os.path.basename(path))[0]] = yaml.safe_load(f)
+        index[kind] = sorted(entities[kind])
+    return {"version": BUNDLE_VERSION, "index": index, "entities": entities}
+
+
+def load_knowledge_bundle(path=os.path.join(KNOWLEDGE_DIR, BUNDLE_NAME)):
+    with open(path, "rb") as f:
+        bundle = pickle.load(f)
+    if bundle.get("version") != BUNDLE_VERSION:
+        raise ValueError(f"Unsupported knowledge bundle version {bundle.get('version')} in {path}")
+    return bundle
@@ -1,42 +1,51 @@
 import os
 import json
+import argparse
 import yaml
-from PyPDF2 import PdfReader
-from sklearn.metrics.pairwise import cosine_similarity
-from vertexai.language_models import TextEmbeddingModel, ChatModel
+import threading
+import time
+import logging
+from collections import Counter
+from stage1_ingestion.extraction_engine import ExtractionEngine
+from stage1_ingestion.pdf_stream import iter_pdf_chunks
+from stage1_ingestion.knowledge_writer import KnowledgeWriter, MERGE_POLICIES
+from stage1_ingestion.ingestion_cache import ResponseCache, load_manifest, save_manifest, sha256_text
+from metrics import metrics, configure_logging, enable_metrics
+from model_backends import get_model
+
+log = logging.getLogger(__name__)
 
 # === CONFIG ===
 PRODUCT_PDF_PATH = "client_inputs/product_guide.pdf"
 DISCLOSURE_PDF_PATH = "client_inputs/risk_disclosures.pdf"
 FLAGS_PATH = "client_inputs/disclosure_flags.json"
-OUTPUT_PRODUCT_DIR = "normalized_knowledge/products"
-OUTPUT_DISCLOSURE_DIR = "normalized_knowledge/disclosures"
+OUTPUT_KNOWLEDGE_DIR = "normalized_knowledge"
 CHUNK_SIZE = 800
 CHUNK_OVERLAP = 100
-MATCH_THRESHOLD = 0.75
+EXTRACTION_CONCURRENCY = 8
+REQUESTS_PER_MINUTE = 120
+CHAT_MODEL_NAME = "chat-bison"
 
-# === INIT MODELS ===
-embedding_model = TextEmbeddingModel.from_pretrained("textembedding-gecko@003")
-chat_model = ChatModel.from_pretrained("chat-bison")
+# === MODELS ===
+def get_chat_model():
+    return get_model("chat", CHAT_MODEL_NAME)
 
 # === UTILITIES ===
-def parse_pdf(file_path):
-    reader = PdfReader(file_path)
-    return "\n".join([page.extract_text() or "" for page in reader.pages])
-
-def chunk_text(text, chunk_size=CHUNK_SIZE, overlap=CHUNK_OVERLAP):
-    tokens = text.split()
-    return [" ".join(tokens[i:i+chunk_size]) for i in range(0, len(tokens), chunk_size - overlap)]
-
-def extract_entities_from_chunk(chunk, entity_type):
-    prompt = f"""
+def build_extraction_prompt(chunk, entity_type):
+    return f"""
 You are a compliance assistant. Extract structured YAML for any {entity_type}s mentioned below.
 Only include YAML. If nothing is found, return nothing.
 
 {chunk}
 """
-    chat = chat_model.start_chat()
-    return chat.send_message(prompt).text.strip()
+
+def extract_entities_from_chunk(chunk, entity_type, model=None, model_name=CHAT_MODEL_NAME):
+    prompt = build_extraction_prompt(chunk, entity_type)
+    chat = (model or get_chat_model()).start_chat()
+    started = time.perf_counter()
+    response = chat.send_message(prompt).text.strip()
+    metrics.record_llm_call(model_name, time.perf_counter() - started, prompt, response)
+    return response
 
 def parse_yaml_blocks(yaml_text):
     blocks = yaml_text.strip().split("---")
@@ -48,13 +57,6 @@ def parse_yaml_blocks(yaml_text):
             continue
     return [b for b in parsed if b]
 
-def save_yaml(data, folder, name):
-    os.makedirs(folder, exist_ok=True)
-    file_name = f"{name.lower().replace(' ', '_')}.yaml"
-    with open(os.path.join(folder, file_name), "w") as f:
-        yaml.dump(data, f, sort_keys=False)
-    print(f"✅ Saved: {folder}/{file_name}")
-
 def load_flags(path):
     if os.path.exists(path):
         with open(path, "r") as f:
@@ -62,45 +64,146 @@ def load_flags(path):
     return {"required_disclosures": []}
 
 # === PIPELINE ===
-def run_entity_extraction_pipeline():
-    print("🚀 Starting entity extraction pipeline...")
-
-    # Step 1: Extract from product guide
-    product_text = parse_pdf(PRODUCT_PDF_PATH)
-    product_chunks = chunk_text(product_text)
-
-    product_entities = []
-    for chunk in product_chunks:
-        response = extract_entities_from_chunk(chunk, "product")
-        if response:
-            product_entities.extend(parse_yaml_blocks(response))
-
-    for entity in product_entities:
-        name = entity.get("product_name", "unknown_product")
-        save_yaml(entity, OUTPUT_PRODUCT_DIR, name)
-
-    # Step 2: Extract from disclosure guide
-    disclosure_text = parse_pdf(DISCLOSURE_PDF_PATH)
-    disclosure_chunks = chunk_text(disclosure_text)
-
-    disclosure_entities = []
-    for chunk in disclosure_chunks:
-        response = extract_entities_from_chunk(chunk, "disclosure")
-        if response:
-            disclosure_entities.extend(parse_yaml_blocks(response))
-
-    for entity in disclosure_entities:
-        name = entity.get("disclosure_name", "unknown_disclosure")
-        save_yaml(entity, OUTPUT_DISCLOSURE_DIR, name)
-
-    # Step 3: Optional - Print disclosure flag status
-    flags = load_flags(FLAGS_PATH)
+def with_source(entities, span):
+    # Every entity records the document and pages it was extracted from, for audit.
+    return [
+        dict(entity, source_document=span.doc_id, source_pages=span.pages) if isinstance(entity, dict) else entity
+        for entity in entities
+    ]
+
+def extract_entities_concurrently(documents, engine, model=None, model_name=CHAT_MODEL_NAME, cache=None):
+    # documents: [(document_path, chunk_spans, entity_type)]. Spans are consumed as they
+    # are streamed and their text is only produced when the chunk is processed. Chunks
+    # already recorded in the document's manifest reuse their parsed entities; the rest
+    # go through the response cache, and only cache misses are sent to the model. All
+    # documents share one pool, so wall time tracks the slowest calls rather than their sum.
+    stats = Counter(reused_chunks=0, cache_hits=0, cache_misses=0, failed_chunks=0)
+    stats_lock = threading.Lock()
+    previous = [load_manifest(document_path, model_name) for document_path, _, _ in documents]
+    current = [{} for _ in documents]
+
+    def count(name):
+        with stats_lock:
+            stats[name] += 1
+
+    def process(job):
+        doc_index, span, entity_type = job
+        chunk = span.text()
+        chunk_hash = sha256_text(entity_type, chunk)
+        metrics.count("chunks", entity_type=entity_type)
+        if chunk_hash in previous[doc_index]:
+            count("reused_chunks")
+            metrics.count("cache_requests", cache="chunk_manifest", result="hit")
+            parsed = current[doc_index][chunk_hash] = previous[doc_index][chunk_hash]
+            return entity_type, with_source(parsed, span)
+
+        prompt = build_extraction_prompt(chunk, entity_type)
+        cache_key = ResponseCache.key(prompt, entity_type, model_name)
+        response = cache.get(cache_key) if cache is not None else None
+        metrics.count("cache_requests", cache="chunk_manifest", result="miss")
+        if response is not None:
+            count("cache_hits")
+            metrics.count("cache_requests", cache="llm_response", result="hit")
+        else:
+            count("cache_misses")
+            metrics.count("cache_requests", cache="llm_response", result="miss")
+            try:
+                response = engine.call(lambda c: extract_entities_from_chunk(c, entity_type, model, model_name), chunk)
+            except Exception as e:
+                count("failed_chunks")
+                metrics.count("failed_chunks", entity_type=entity_type)
+                log.warning(f"⚠️ Skipping {entity_type} chunk (pages {span.pages[0]}-{span.pages[1]}) after retries: "
+                            f"{type(e).__name__}: {e}")
+                return entity_type, []
+            if cache is not None:
+                cache.put(cache_key, response)
+        parsed = current[doc_index][chunk_hash] = parse_yaml_blocks(response) if response else []
+        return entity_type, with_source(parsed, span)
+
+    jobs = (
+        (doc_index, span, entity_type)
+        for doc_index, (_, spans, entity_type) in enumerate(documents)
+        for span in spans
+    )
+    results = engine.run(process, jobs)
+
+    for (document_path, _, _), chunks in zip(documents, current):
+        save_manifest(document_path, model_name, chunks)
+
+    entities = {entity_type: [] for _, _, entity_type in documents}
+    for entity_type, parsed in results:
+        entities[entity_type].extend(parsed)
+    return entities, dict(stats)
+
+def run_entity_extraction_pipeline(
+    engine=None,
+    model=None,
+    model_name=CHAT_MODEL_NAME,
+    cache=None,
+    writer=None,
+    product_pdf_path=PRODUCT_PDF_PATH,
+    disclosure_pdf_path=DISCLOSURE_PDF_PATH,
+    flags_path=FLAGS_PATH,
+):
+    log.info("🚀 Starting entity extraction pipeline...")
+    engine = engine or ExtractionEngine(max_concurrency=EXTRACTION_CONCURRENCY, requests_per_minute=REQUESTS_PER_MINUTE)
+    cache = cache or ResponseCache()
+    writer = writer or KnowledgeWriter(OUTPUT_KNOWLEDGE_DIR)
+
+    # Step 1: Stream chunk spans from the product and disclosure guides
+    product_chunks = iter_pdf_chunks(product_pdf_path, chunk_size=CHUNK_SIZE, overlap=CHUNK_OVERLAP)
+    disclosure_chunks = iter_pdf_chunks(disclosure_pdf_path, chunk_size=CHUNK_SIZE, overlap=CHUNK_OVERLAP)
+
+    # Step 2: Extract entities from both documents concurrently, skipping unchanged chunks
+    # (PDF parsing is streamed into this stage, so its time is included here)
+    with metrics.stage("ingestion.extract"):
+        entities, stats = extract_entities_concurrently(
+            [(product_pdf_path, product_chunks, "product"), (disclosure_pdf_path, disclosure_chunks, "disclosure")],
+            engine, model, model_name, cache,
+        )
+
+    # Step 3: Merge entities by normalized name, write each file once, compile the bundle
+    with metrics.stage("ingestion.write"):
+        for entity in entities["product"]:
+            writer.add("products", entity, "product_name")
+        for entity in entities["disclosure"]:
+            writer.add("disclosures", entity, "disclosure_name")
+        writer.flush()
+    with metrics.stage("ingestion.bundle"):
+        writer.write_bundle()
+
+    # Step 4: Optional - Print disclosure flag status
+    flags = load_flags(flags_path)
     if flags["required_disclosures"]:
-        print("\n📋 Required Disclosures from Flags:")
+        log.info("📋 Required Disclosures from Flags:")
         for d in flags["required_disclosures"]:
-            print(f" - {d}")
-
-    print("\n✅ Entity extraction complete. Structured YAML files are ready.")
-
-# === RUN ===
-run_entity_extraction_pipeline()
+            log.info(f" - {d}")
+
+    log.info(f"📊 Chunks reused from manifest: {stats['reused_chunks']}, "
+             f"cache hits: {stats['cache_hits']}, cache misses: {stats['cache_misses']}, failed: {stats['failed_chunks']}")
+    log.info("✅ Entity extraction complete. Structured YAML files are ready.")
+    metrics.write_report(time.strftime("ingestion-%Y%m%d-%H%M%S"))
+
+# === CLI ===
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Extract product and disclosure knowledge from guide PDFs.")
+    parser.add_argument("--input", default=PRODUCT_PDF_PATH, help="Product guide PDF")
+    parser.add_argument("--disclosures", default=DISCLOSURE_PDF_PATH, help="Risk disclosures PDF")
+    parser.add_argument("--flags", default=FLAGS_PATH, help="Disclosure flags JSON")
+    parser.add_argument("--output", default=OUTPUT_KNOWLEDGE_DIR, help="Normalized knowledge folder")
+    parser.add_argument("--merge-policy", choices=MERGE_POLICIES, help="Defaults to config/system_config.yaml")
+    parser.add_argument("--concurrency", type=int, default=EXTRACTION_CONCURRENCY)
+    parser.add_argument("--requests-per-minute", type=int, default=REQUESTS_PER_MINUTE)
+    parser.add_argument("--metrics", action="store_true", help="Write a metrics report (same as COMPLISENSE_METRICS=1)")
+    args = parser.parse_args(argv)
+
+    configure_logging()
+    if args.metrics:
+        enable_metrics()
+    run_entity_extraction_pipeline(
+        engine=ExtractionEngine(max_concurrency=args.concurrency, requests_per_minute=args.requests_per_minute),
+        writer=KnowledgeWriter(args.output, args.merge_policy),
+        product_pdf_path=args.input,
+        disclosure_pdf_path=args.disclosures,
+        flags_path=args.flags,
+    )
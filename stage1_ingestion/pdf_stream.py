@@ -0,0 +1,163 @@
+import os
+import re
+import threading
+import multiprocessing
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import NamedTuple
+
+from metrics import metrics
+
+# === CONFIG ===
+CHUNK_SIZE = 800
+CHUNK_OVERLAP = 100
+PARSE_WORKERS = os.cpu_count() or 1
+PAGES_PER_TASK = 8
+PAGE_CACHE_SIZE = 32
+OPEN_READERS = 4            # documents kept parsed for on-demand page reads
+# Not fork: extraction threads may already be running gRPC calls when a pool starts
+PARSE_START_METHOD = "spawn"
+TOKEN_PATTERN = re.compile(r"\S+")
+
+
+# === PAGE CACHE ===
+# Recently streamed pages, so chunk text can be produced right after a chunk is
+# yielded without extracting the page a second time. Older pages are re-read on demand
+# from a reader kept open per document, not by parsing the PDF again.
+_page_cache = OrderedDict()
+_page_cache_lock = threading.Lock()
+_readers = OrderedDict()  # source -> (PdfReader, lock)
+_readers_lock = threading.Lock()
+
+
+def _remember_page(source, page_no, text):
+    with _page_cache_lock:
+        _page_cache[(source, page_no)] = text
+        _page_cache.move_to_end((source, page_no))
+        while len(_page_cache) > PAGE_CACHE_SIZE:
+            _page_cache.popitem(last=False)
+
+
+def page_text(source, page_no):
+    with _page_cache_lock:
+        text = _page_cache.get((source, page_no))
+    if text is None:
+        reader, lock = _open_reader(source)
+        with lock:
+            text = reader.pages[page_no].extract_text() or ""
+        _remember_page(source, page_no, text)
+    return text
+
+
+def _open_reader(source):
+    with _readers_lock:
+        entry = _readers.get(source)
+        if entry is None:
+            from PyPDF2 import PdfReader
+            # PdfReader is not thread-safe, so each one gets its own lock
+            entry = _readers[source] = (PdfReader(source), threading.Lock())
+        _readers.move_to_end(source)
+        while len(_readers) > OPEN_READERS:
+            _readers.popitem(last=False)
+        return entry
+
+
+# === PAGE EXTRACTION ===
+def _extract_page_range(source, start, end):
+    from PyPDF2 import PdfReader
+    reader = PdfReader(source)
+    return [page.extract_text() or "" for page in reader.pages[start:end]]
+
+
+def iter_pages(source, workers=PARSE_WORKERS, pages_per_task=PAGES_PER_TASK):
+    # Yields (page_no, text) in page order. Page ranges are extracted across a process
+    # pool with a bounded number of ranges in flight, so memory does not grow with the
+    # document.
+    from PyPDF2 import PdfReader
+    num_pages = len(PdfReader(source).pages)
+    metrics.count("pdf_pages", num_pages)
+    ranges = [(start, min(num_pages, start + pages_per_task)) for start in range(0, num_pages, pages_per_task)]
+
+    if workers <= 1 or len(ranges) <= 1:
+        for start, end in ranges:
+            for offset, text in enumerate(_extract_page_range(source, start, end)):
+                _remember_page(source, start + offset, text)
+                yield start + offset, text
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context(PARSE_START_METHOD)) as pool:
+        pending = deque()
+        remaining = iter(ranges)
+        for start, end in remaining:
+            pending.append((start, pool.submit(_extract_page_range, source, start, end)))
+            if len(pending) >= workers * 2:
+                break
+        while pending:
+            start, future = pending.popleft()
+            for offset, text in enumerate(future.result()):
+                _remember_page(source, start + offset, text)
+                yield start + offset, text
+            for next_start, next_end in remaining:
+                pending.append((next_start, pool.submit(_extract_page_range, source, next_start, next_end)))
+                break
+
+
+# === CHUNKING ===
+class ChunkSpan(NamedTuple):
+    doc_id: str
+    source: str
+    page_start: int
+    char_start: int
+    page_end: int
+    char_end: int
+
+    @property
+    def pages(self):
+        # 1-based, inclusive page range for audit trails
+        return [self.page_start + 1, self.page_end + 1]
+
+    def text(self):
+        parts = []
+        for page_no in range(self.page_start, self.page_end + 1):
+            body = page_text(self.source, page_no)
+            start = self.char_start if page_no == self.page_start else 0
+            end = self.char_end if page_no == self.page_end else len(body)
+            parts.extend(TOKEN_PATTERN.findall(body, start, end))
+        return " ".join(parts)
+
+
+def iter_chunk_spans(pages, doc_id, source, chunk_size=CHUNK_SIZE, overlap=CHUNK_OVERLAP):
+    # Same chunk boundaries as chunk_text (a chunk starts every chunk_size - overlap
+    # tokens), but only the current window of token positions is held in memory.
+    step = chunk_size - overlap
+    if step <= 0:
+        raise ValueError(f"overlap ({overlap}) must be smaller than chunk_size ({chunk_size})")
+
+    window = deque()
+    for page_no, text in pages:
+        for match in TOKEN_PATTERN.finditer(text):
+            window.append((page_no, match.start(), match.end()))
+            if len(window) == chunk_size:
+                yield _span(doc_id, source, window)
+                for _ in range(step):
+                    window.popleft()
+    while window:
+        yield _span(doc_id, source, window)
+        for _ in range(min(step, len(window))):
+            window.popleft()
+
+
+def _span(doc_id, source, window):
+    first_page, first_start, _ = window[0]
+    last_page, _, last_end = window[-1]
+    return ChunkSpan(doc_id, source, first_page, first_start, last_page, last_end)
+
+
+def iter_pdf_chunks(source, doc_id=None, chunk_size=CHUNK_SIZE, overlap=CHUNK_OVERLAP, workers=PARSE_WORKERS):
+    doc_id = doc_id or os.path.splitext(os.path.basename(source))[0]
+    return iter_chunk_spans(iter_pages(source, workers), doc_id, source, chunk_size, overlap)
+
+
+def chunk_text(text, chunk_size=CHUNK_SIZE, overlap=CHUNK_OVERLAP):
+    tokens = text.split()
+    return [" ".join(tokens[i:i + chunk_size]) for i in range(0, len(tokens), chunk_size - overlap)]
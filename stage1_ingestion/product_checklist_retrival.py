@@ -1,7 +1,9 @@
 import os
-from PyPDF2 import PdfReader
-from vertexai.language_models import TextEmbeddingModel
-from sklearn.metrics.pairwise import cosine_similarity
+import logging
+from stage1_ingestion.pdf_stream import iter_pdf_chunks
+from metrics import metrics
+
+log = logging.getLogger(__name__)
 
 # === CONFIG ===
 PRODUCT_GUIDE_PATH = "client_inputs/product_guide.pdf"
@@ -9,67 +11,74 @@ EMBEDDING_MODEL_NAME = "textembedding-gecko@003"
 CHUNK_SIZE = 800
 CHUNK_OVERLAP = 100
 WINDOW_SIZE = 1  # Number of chunks before and after the best match
-
-# === INIT EMBEDDING MODEL ===
-print("🔁 Loading embedding model...")
-embedding_model = TextEmbeddingModel.from_pretrained(EMBEDDING_MODEL_NAME)
+TOP_K = 3  # Number of best-matching chunks considered per product
 
 # === UTILITY FUNCTIONS ===
-def parse_pdf(file_path):
-    print(f"📄 Reading and extracting text from PDF: {file_path}")
-    reader = PdfReader(file_path)
-    text = "\n".join([page.extract_text() or "" for page in reader.pages])
-    print(f"✅ Extracted {len(text)} characters of raw text from PDF.")
-    return text
-
-def chunk_text(text, chunk_size=CHUNK_SIZE, overlap=CHUNK_OVERLAP):
-    print("✂️ Chunking text...")
-    tokens = text.split()
-    chunks = [
-        " ".join(tokens[i:i+chunk_size])
-        for i in range(0, len(tokens), chunk_size - overlap)
-    ]
-    print(f"✅ Created {len(chunks)} overlapping chunks.")
-    return chunks
+def load_chunk_spans(pdf_path):
+    log.info(f"📄 Streaming and chunking PDF: {pdf_path}")
+    return iter_pdf_chunks(pdf_path, chunk_size=CHUNK_SIZE, overlap=CHUNK_OVERLAP)
 
 def embed(texts):
-    print(f"🧠 Embedding {len(texts)} text blocks...")
-    return embedding_model.embed_documents(texts)
+    # float32 matrix, one row per text; repeated texts are only sent to the model once
+    log.debug("🧠 Embedding %d text blocks...", len(texts))
+    from embedding_client import get_embedding_client
+    return get_embedding_client("text_embedding", EMBEDDING_MODEL_NAME).embed(texts)
+
+def load_product_index(pdf_path=PRODUCT_GUIDE_PATH):
+    # numpy is only needed once there is an index to build or search
+    from stage1_ingestion.vector_index import load_or_build_index
+    return load_or_build_index(
+        pdf_path,
+        load_spans=load_chunk_spans,
+        embed_fn=embed,
+        chunk_size=CHUNK_SIZE,
+        chunk_overlap=CHUNK_OVERLAP,
+        model_name=EMBEDDING_MODEL_NAME,
+    )
+
+def retrieve_products_with_windows(product_names, pdf_path=PRODUCT_GUIDE_PATH, window_size=WINDOW_SIZE, top_k=TOP_K):
+    log.debug("🚀 Retrieving sections for %d products (top_k = %d, context window = %d)", len(product_names), top_k, window_size)
+
+    from stage1_ingestion.vector_index import top_k_windows
+
+    names = list(dict.fromkeys(product_names))
+    if not names:
+        return {}
+
+    # Step 1: Load the chunked, embedded guide (built once per PDF + chunking params)
+    with metrics.stage("retrieval.index_load"):
+        index = load_product_index(pdf_path)
+
+    # Step 2: Embed every distinct product name (names seen before come from the client's cache)
+    with metrics.stage("retrieval.embed_queries"):
+        query_embeddings = embed(names)
+
+    # Step 3: Score all queries against all chunks at once and keep the top-k windows
+    log.debug("🔍 Scoring %d queries against %d chunks...", len(names), len(index))
+    with metrics.stage("retrieval.score"):
+        windows_per_query = top_k_windows(index, query_embeddings, top_k, window_size)
+
+    results = {}
+    for name, windows in zip(names, windows_per_query):
+        for window in windows:
+            window["text"] = "\n\n".join(index.chunks[window["start"]:window["end"]])
+        results[name] = windows
+    return results
 
 def retrieve_product_with_window(product_name, pdf_path=PRODUCT_GUIDE_PATH, window_size=WINDOW_SIZE):
-    print(f"\n🚀 Retrieving product section for: '{product_name}' with context window = {window_size}")
-    
-    # Step 1: Read and chunk the PDF
-    full_text = parse_pdf(pdf_path)
-    chunks = chunk_text(full_text)
-
-    # Step 2: Embed chunks and product name
-    chunk_embeddings = embed(chunks)
-    product_embedding = embedding_model.embed_documents([product_name])[0]
-
-    # Step 3: Score each chunk by similarity
-    print("🔍 Calculating cosine similarities...")
-    scores = []
-    for i, chunk_vec in enumerate(chunk_embeddings):
-        score = cosine_similarity(
-            [product_embedding.values],
-            [chunk_vec.values]
-        )[0][0]
-        scores.append((score, i))
-        print(f"   - Chunk {i:02}: Score = {score:.4f}")
-
-    # Step 4: Find the best match and get window
-    best_score, best_index = max(scores, key=lambda x: x[0])
-    print(f"\n🏆 Best match: Chunk {best_index} with score {best_score:.4f}")
-
-    start = max(0, best_index - window_size)
-    end = min(len(chunks), best_index + window_size + 1)
-    selected_chunks = chunks[start:end]
-
-    print(f"📦 Returning chunks {start} to {end - 1} (total {len(selected_chunks)} chunks)")
-    return "\n\n".join(selected_chunks)
+    windows = retrieve_products_with_windows([product_name], pdf_path, window_size, top_k=1)[product_name]
+    if not windows:
+        log.warning(f"⚠️ No chunks indexed for {pdf_path}")
+        return ""
+
+    best = windows[0]
+    log.debug("🏆 Best match: Chunk %d with score %.4f", best["best_chunk"], best["score"])
+    log.debug("📦 Returning chunks %d to %d (total %d chunks, pages %d-%d)",
+              best["start"], best["end"] - 1, best["end"] - best["start"], best["pages"][0], best["pages"][1])
+    return best["text"]
 
 # === EXAMPLE USAGE ===
 # result = retrieve_product_with_window("FX Forward", window_size=2)
 # print(result)
+# results = retrieve_products_with_windows(["FX Forward", "Bonds (Secondary)"], top_k=3)
 
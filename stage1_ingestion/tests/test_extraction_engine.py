@@ -0,0 +1,122 @@
+import time
+
+import pytest
+
+from stage1_ingestion.extraction_engine import ExtractionEngine, TokenBucket
+from stage1_ingestion.fake_models import FakeChatModel
+
+
+def ask(model):
+    return lambda prompt: model.start_chat().send_message(prompt).text
+
+
+def test_map_returns_results_in_input_order():
+    # jitter makes calls finish out of order
+    model = FakeChatModel(latency=0.001, jitter=0.01, responder=str.upper, seed=3)
+    engine = ExtractionEngine(max_concurrency=4, requests_per_minute=None)
+    prompts = [f"chunk {i}" for i in range(40)]
+    assert engine.map(ask(model), prompts) == [p.upper() for p in prompts]
+    assert model.usage()["calls"] == 40
+
+
+def test_run_pulls_items_lazily():
+    engine = ExtractionEngine(max_concurrency=2, requests_per_minute=None)
+    pulled = []
+
+    def items():
+        for i in range(100):
+            pulled.append(i)
+            yield i
+
+    seen_in_flight = []
+
+    def fn(item):
+        seen_in_flight.append(len(pulled) - item)
+        return item
+
+    assert engine.run(fn, items()) == list(range(100))
+    assert max(seen_in_flight) <= 2 * 2
+
+
+class Flaky:
+    # Fails with `error` on the first `failures` calls, then answers through the fake model
+    def __init__(self, failures, error):
+        self.model = FakeChatModel(latency=0, responder=lambda prompt: f"ok {prompt}")
+        self.failures = failures
+        self.error = error
+        self.calls = 0
+
+    def __call__(self, prompt):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise self.error
+        return ask(self.model)(prompt)
+
+
+def test_call_retries_transient_errors():
+    engine = ExtractionEngine(requests_per_minute=None, max_retries=3, backoff_base=0)
+    flaky = Flaky(2, ConnectionError("dropped"))
+    assert engine.call(flaky, "chunk") == "ok chunk"
+    assert flaky.calls == 3
+    assert engine.retries == 2
+
+
+def test_call_gives_up_after_max_retries():
+    engine = ExtractionEngine(requests_per_minute=None, max_retries=2, backoff_base=0)
+    flaky = Flaky(10, TimeoutError("slow"))
+    with pytest.raises(TimeoutError):
+        engine.call(flaky, "chunk")
+    assert flaky.calls == 3
+
+
+def test_call_reraises_non_transient_errors_without_retry():
+    engine = ExtractionEngine(requests_per_minute=None, max_retries=3, backoff_base=0)
+    flaky = Flaky(1, ValueError("bad prompt"))
+    with pytest.raises(ValueError):
+        engine.call(flaky, "chunk")
+    assert flaky.calls == 1
+    assert engine.retries == 0
+
+
+def test_map_return_exceptions_keeps_positions():
+    engine = ExtractionEngine(max_concurrency=3, requests_per_minute=None, max_retries=0)
+
+    def fn(item):
+        if item % 3 == 0:
+            raise ValueError(item)
+        return item
+
+    results = engine.map(fn, range(7), return_exceptions=True)
+    assert [type(r) for r in results[::3]] == [ValueError] * 3
+    assert [r for i, r in enumerate(results) if i % 3] == [1, 2, 4, 5]
+
+
+def test_map_raises_first_failure_by_default():
+    engine = ExtractionEngine(max_concurrency=2, requests_per_minute=None, max_retries=0)
+
+    def fn(item):
+        if item == 5:
+            raise ValueError(item)
+        return item
+
+    with pytest.raises(ValueError):
+        engine.map(fn, range(20))
+
+
+def test_token_bucket_allows_burst_then_paces():
+    bucket = TokenBucket(rate_per_second=50, capacity=5)
+    started = time.monotonic()
+    for _ in range(5):
+        bucket.acquire()
+    assert time.monotonic() - started < 0.05
+    for _ in range(10):
+        bucket.acquire()
+    # 10 more tokens at 50/s take about 0.2s
+    assert 0.15 <= time.monotonic() - started < 0.6
+
+
+def test_engine_rate_limits_calls():
+    engine = ExtractionEngine(max_concurrency=4, requests_per_minute=600)  # 10/s, burst of 10
+    started = time.monotonic()
+    engine.map(lambda item: item, range(15))
+    assert time.monotonic() - started >= 0.4
@@ -0,0 +1,44 @@
+import pytest
+
+from model_backends import active_backend, use_backend
+from stage1_ingestion.ingestion_cache import ResponseCache, load_manifest, save_manifest
+from stage1_ingestion.vector_index import index_key
+
+
+@pytest.fixture
+def restore_backend():
+    previous = active_backend()
+    yield
+    use_backend(previous)
+
+
+def test_response_cache_round_trip_and_eviction(tmp_path):
+    cache = ResponseCache(str(tmp_path / "responses.sqlite"), max_bytes=10)
+    cache.put("a", "12345")
+    cache.put("b", "67890")
+    assert cache.get("a") == "12345"
+    cache.put("c", "abcde")  # over budget: least recently used ("b") goes
+    assert (cache.get("b"), cache.get("a"), cache.get("c")) == (None, "12345", "abcde")
+    cache.close()
+
+
+def test_manifest_round_trip(tmp_path):
+    document = str(tmp_path / "guide.pdf")
+    save_manifest(document, "chat-bison", {"hash": {"entities": []}}, manifest_dir=str(tmp_path))
+    assert load_manifest(document, "chat-bison", manifest_dir=str(tmp_path)) == {"hash": {"entities": []}}
+    assert load_manifest(document, "gemini-pro", manifest_dir=str(tmp_path)) == {}
+
+
+def test_cached_results_are_not_shared_across_backends(tmp_path, restore_backend):
+    document = str(tmp_path / "guide.pdf")
+    use_backend("live")
+    live_keys = (ResponseCache.key("prompt", "product", "chat-bison"), index_key("sha", 800, 100, "gecko"))
+
+    use_backend("fake")
+    fake_keys = (ResponseCache.key("prompt", "product", "chat-bison"), index_key("sha", 800, 100, "gecko"))
+    save_manifest(document, "chat-bison", {"hash": {"entities": []}}, manifest_dir=str(tmp_path))
+    assert load_manifest(document, "chat-bison", manifest_dir=str(tmp_path)) == {"hash": {"entities": []}}
+
+    use_backend("live")
+    assert live_keys[0] != fake_keys[0] and live_keys[1] != fake_keys[1]
+    assert load_manifest(document, "chat-bison", manifest_dir=str(tmp_path)) == {}
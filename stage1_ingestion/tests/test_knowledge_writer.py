@@ -0,0 +1,97 @@
+import os
+
+import pytest
+import yaml
+
+from stage1_ingestion.knowledge_writer import (
+    KnowledgeWriter, compile_knowledge_bundle, load_knowledge_bundle, merge_entities, normalize_name,
+)
+
+
+def read(path):
+    with open(path) as f:
+        return yaml.safe_load(f)
+
+
+def test_normalize_name():
+    assert normalize_name("Bonds (Secondary)") == "bonds_secondary"
+    assert normalize_name("  FX Forward ") == "fx_forward"
+    assert normalize_name("!!!") == "unknown"
+
+
+def test_add_only_keeps_existing_values_and_extends_lists():
+    merged = merge_entities({"ccy": "USD", "tags": ["a"]}, {"ccy": "EUR", "tags": ["a", "b"], "tenor": "1Y"}, "add-only")
+    assert merged == {"ccy": "USD", "tags": ["a", "b"], "tenor": "1Y"}
+
+
+def test_overwrite_replaces_values():
+    assert merge_entities({"ccy": "USD", "tags": ["a"]}, {"ccy": "EUR"}, "overwrite") == {"ccy": "EUR", "tags": ["a"]}
+
+
+def test_conservative_records_conflicts_once():
+    merged = merge_entities({"ccy": "USD"}, {"ccy": "EUR"}, "conservative")
+    merged = merge_entities(merged, {"ccy": "EUR"}, "conservative")
+    assert merged == {"ccy": "USD", "_conflicts": [{"field": "ccy", "value": "EUR"}]}
+
+
+def test_empty_values_are_filled_and_sources_accumulate():
+    merged = merge_entities(
+        {"price": "", "sources": [{"document": "a.pdf", "pages": [1, 1]}]},
+        {"price": "1.0", "sources": [{"document": "a.pdf", "pages": [1, 1]}, {"document": "b.pdf", "pages": [2, 3]}]},
+        "add-only",
+    )
+    assert merged["price"] == "1.0"
+    assert [s["document"] for s in merged["sources"]] == ["a.pdf", "b.pdf"]
+
+
+def test_writer_merges_in_memory_and_writes_once(tmp_path):
+    writer = KnowledgeWriter(str(tmp_path), "add-only")
+    writer.add("products", {"product_name": "FX Forward", "ccy": "USD", "source_document": "g.pdf", "source_pages": [1, 2]}, "product_name")
+    writer.add("products", {"product_name": "fx forward", "tenor": "3M", "source_document": "g.pdf", "source_pages": [5, 5]}, "product_name")
+    assert writer.flush() == 1
+    entity = read(tmp_path / "products" / "fx_forward.yaml")
+    assert entity["ccy"] == "USD" and entity["tenor"] == "3M"
+    assert entity["sources"] == [{"document": "g.pdf", "pages": [1, 2]}, {"document": "g.pdf", "pages": [5, 5]}]
+
+
+def test_unchanged_entities_are_not_rewritten(tmp_path):
+    for expected in (1, 0):
+        writer = KnowledgeWriter(str(tmp_path), "add-only")
+        writer.add("products", {"product_name": "FX Forward", "ccy": "USD"}, "product_name")
+        assert writer.flush() == expected
+
+
+def test_overwrite_policy_applies_to_files_on_disk(tmp_path):
+    for ccy in ("USD", "EUR"):
+        writer = KnowledgeWriter(str(tmp_path), "overwrite")
+        writer.add("products", {"product_name": "FX Forward", "ccy": ccy}, "product_name")
+        writer.flush()
+    assert read(tmp_path / "products" / "fx_forward.yaml")["ccy"] == "EUR"
+
+
+def test_legacy_file_names_are_merged_and_replaced(tmp_path):
+    folder = tmp_path / "products"
+    folder.mkdir()
+    with open(folder / "bonds_(secondary).yaml", "w") as f:
+        yaml.dump({"product_name": "Bonds (Secondary)", "ccy": "USD"}, f)
+
+    writer = KnowledgeWriter(str(tmp_path), "add-only")
+    writer.add("products", {"product_name": "Bonds (Secondary)", "tenor": "5Y"}, "product_name")
+    writer.flush()
+
+    assert os.listdir(folder) == ["bonds_secondary.yaml"]
+    assert read(folder / "bonds_secondary.yaml") == {"product_name": "Bonds (Secondary)", "ccy": "USD", "tenor": "5Y"}
+    assert compile_knowledge_bundle(str(tmp_path))["index"] == {"products": ["bonds_secondary"]}
+
+
+def test_bundle_is_written_before_any_knowledge_file(tmp_path):
+    # Nothing was extracted, so the knowledge folder does not exist yet
+    writer = KnowledgeWriter(str(tmp_path / "knowledge"), "add-only")
+    assert writer.flush() == 0
+    bundle = load_knowledge_bundle(writer.write_bundle())
+    assert bundle["index"] == {} and bundle["entities"] == {}
+
+
+def test_unknown_merge_policy_is_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        KnowledgeWriter(str(tmp_path), "replace-all")
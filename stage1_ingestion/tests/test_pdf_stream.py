@@ -0,0 +1,39 @@
+import pytest
+
+pytest.importorskip("PyPDF2")
+
+from benchmarks.synthetic import write_text_pdf
+from stage1_ingestion import pdf_stream
+from stage1_ingestion.pdf_stream import chunk_text, iter_pages, iter_pdf_chunks, page_text
+
+
+@pytest.fixture
+def pdf(tmp_path):
+    path = str(tmp_path / "guide.pdf")
+    pages = [[f"page {p} line {i} " + "word " * (i % 7) for i in range(20)] for p in range(6)]
+    write_text_pdf(path, pages)
+    return path
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_chunk_spans_match_chunk_text(pdf, workers):
+    full_text = "\n".join(text for _, text in iter_pages(pdf, workers=1))
+    spans = list(iter_pdf_chunks(pdf, chunk_size=50, overlap=10, workers=workers))
+    assert [span.text() for span in spans] == chunk_text(full_text, chunk_size=50, overlap=10)
+    assert spans[0].doc_id == "guide"
+
+
+def test_pages_come_back_in_order_from_the_pool(pdf):
+    pages = list(iter_pages(pdf, workers=2, pages_per_task=1))
+    assert [page_no for page_no, _ in pages] == list(range(6))
+    assert all(f"page {page_no} line 0" in text for page_no, text in pages)
+
+
+def test_page_text_reuses_one_reader_after_cache_eviction(pdf, monkeypatch):
+    monkeypatch.setattr(pdf_stream, "PAGE_CACHE_SIZE", 1)
+    pdf_stream._page_cache.clear()
+    pdf_stream._readers.clear()
+    assert "page 3 line 0" in page_text(pdf, 3)
+    assert "page 1 line 0" in page_text(pdf, 1)
+    assert "page 3 line 0" in page_text(pdf, 3)
+    assert list(pdf_stream._readers) == [pdf]
@@ -0,0 +1,129 @@
+import numpy as np
+import pytest
+
+from stage1_ingestion import product_checklist_retrival, vector_index
+from stage1_ingestion.vector_index import VectorIndex, merge_windows, normalize_rows, top_k_windows
+
+
+def make_index(vectors):
+    embeddings = normalize_rows(vectors)
+    chunks = [f"chunk {i}" for i in range(len(vectors))]
+    pages = [[i, i] for i in range(len(vectors))]
+    return VectorIndex("key", chunks, pages, [[i, 0, i, 1] for i in range(len(vectors))], embeddings)
+
+
+def test_merge_windows_joins_overlapping_hits_and_keeps_best_score():
+    merged = merge_windows([(2, 0.5), (3, 0.9), (8, 0.7)], window_size=1, num_chunks=10)
+    assert merged == [[1, 5, 0.9, 3], [7, 10, 0.7, 8]]
+
+
+def test_merge_windows_clamps_to_document():
+    assert merge_windows([(0, 1.0), (9, 0.5)], window_size=2, num_chunks=10) == [[0, 3, 1.0, 0], [7, 10, 0.5, 9]]
+
+
+def test_top_k_windows_ranks_per_query():
+    index = make_index([[1, 0, 0], [0, 1, 0], [0, 0, 1], [1, 1, 0]])
+    results = top_k_windows(index, [[0, 1, 0], [0, 0, 1]], top_k=1, window_size=0)
+    assert [w["best_chunk"] for w in results[0]] == [1]
+    assert [w["best_chunk"] for w in results[1]] == [2]
+    assert results[1][0]["pages"] == [3, 3]
+    assert results[0][0]["score"] == np.float32(1.0)
+
+
+def test_top_k_windows_caps_k_at_index_size():
+    # both chunks are hits; adjacent windows merge into one
+    index = make_index([[1, 0], [0, 1]])
+    results = top_k_windows(index, [[1, 0]], top_k=5, window_size=0)
+    assert [(w["start"], w["end"], w["best_chunk"]) for w in results[0]] == [(0, 2, 0)]
+
+
+def test_top_k_windows_empty_inputs():
+    assert top_k_windows(make_index([[1, 0]]), np.zeros((0, 0), dtype=np.float32), top_k=3, window_size=1) == []
+    empty = VectorIndex("key", [], [], [], np.zeros((0, 0), dtype=np.float32))
+    assert top_k_windows(empty, [[1, 0]], top_k=3, window_size=1) == [[]]
+
+
+def test_retrieve_products_with_windows_empty_list(tmp_path):
+    # No index is loaded (the PDF does not even exist) and no query is embedded
+    assert product_checklist_retrival.retrieve_products_with_windows([], pdf_path=str(tmp_path / "missing.pdf")) == {}
+
+
+class FakeSpan:
+    def __init__(self, page, text):
+        self.page_start = self.page_end = page
+        self.char_start, self.char_end = 0, len(text)
+        self._text = text
+
+    def text(self):
+        return self._text
+
+
+def load_lines(path):
+    with open(path) as f:
+        return [FakeSpan(page, line) for page, line in enumerate(f.read().splitlines(), 1)]
+
+
+@pytest.fixture
+def build(tmp_path, monkeypatch):
+    # Calls load_or_build_index with a counting embed_fn and an empty process cache,
+    # so every call goes to disk
+    monkeypatch.setattr(vector_index, "_open_indexes", {})
+    embedded = []
+
+    def embed_fn(texts):
+        embedded.append(list(texts))
+        return [[len(text), 1.0] for text in texts]
+
+    def run(pdf_path, chunk_size=100, chunk_overlap=10, model_name="model-a"):
+        vector_index._open_indexes.clear()
+        return vector_index.load_or_build_index(pdf_path, load_lines, embed_fn, chunk_size, chunk_overlap,
+                                                model_name, index_dir=str(tmp_path / "index"))
+
+    run.embedded = embedded
+    return run
+
+
+def write_pdf(path, text):
+    path.write_text(text)
+    return str(path)
+
+
+def test_load_or_build_index_reuses_unchanged_pdf(tmp_path, build):
+    pdf = write_pdf(tmp_path / "doc.pdf", "alpha\nbeta gamma\n")
+    first = build(pdf)
+    second = build(pdf)
+    assert build.embedded == [["alpha", "beta gamma"]]
+    assert second.key == first.key
+    assert second.chunks == ["alpha", "beta gamma"]
+    assert second.chunk_pages == [[1, 1], [2, 2]]
+
+
+@pytest.mark.parametrize("change", [
+    {"chunk_size": 200},
+    {"chunk_overlap": 20},
+    {"model_name": "model-b"},
+])
+def test_load_or_build_index_rebuilds_on_parameter_change(tmp_path, build, change):
+    pdf = write_pdf(tmp_path / "doc.pdf", "alpha\n")
+    first = build(pdf)
+    changed = build(pdf, **change)
+    assert len(build.embedded) == 2
+    assert changed.key != first.key
+
+
+def test_load_or_build_index_rebuilds_on_content_change(tmp_path, build):
+    pdf = write_pdf(tmp_path / "doc.pdf", "alpha\n")
+    build(pdf)
+    write_pdf(tmp_path / "doc.pdf", "delta\n")
+    index = build(pdf)
+    assert build.embedded == [["alpha"], ["delta"]]
+    assert index.chunks == ["delta"]
+
+
+def test_load_or_build_index_maps_matrix_read_only(tmp_path, build):
+    index = build(write_pdf(tmp_path / "doc.pdf", "alpha\nbeta\n"))
+    assert isinstance(index.embeddings, np.memmap)
+    assert not index.embeddings.flags.writeable
+    assert index.embeddings.shape == (2, 2)
+    with pytest.raises(ValueError):
+        index.embeddings[0, 0] = 0.0
@@ -0,0 +1,172 @@
+import os
+import json
+import hashlib
+import logging
+
+import numpy as np
+
+from metrics import metrics
+from model_backends import model_cache_key
+from stage1_ingestion.atomic_write import write_atomic
+
+log = logging.getLogger(__name__)
+
+# === CONFIG ===
+INDEX_DIR = ".vector_index"
+INDEX_VERSION = 3
+HASH_BLOCK_SIZE = 1 << 20
+
+# Indexes already opened by this process, keyed by (path, mtime, size) so a
+# query never re-hashes an unchanged PDF.
+_open_indexes = {}
+
+
+class VectorIndex:
+    def __init__(self, key, chunks, chunk_pages, chunk_spans, embeddings):
+        self.key = key
+        self.chunks = chunks
+        self.chunk_pages = chunk_pages
+        self.chunk_spans = chunk_spans
+        self.embeddings = embeddings
+
+    def __len__(self):
+        return len(self.chunks)
+
+
+# === KEYING ===
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def index_key(pdf_sha256, chunk_size, chunk_overlap, model_name):
+    params = f"v{INDEX_VERSION}:{pdf_sha256}:{chunk_size}:{chunk_overlap}:{model_cache_key(model_name)}"
+    return hashlib.sha256(params.encode("utf-8")).hexdigest()
+
+
+def _index_paths(key, index_dir):
+    base = os.path.join(index_dir, key)
+    return base + ".npy", base + ".json"
+
+
+# === BUILD ===
+def normalize_rows(vectors):
+    matrix = np.array(vectors, dtype=np.float32, ndmin=2)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return np.ascontiguousarray(matrix / norms)
+
+
+def build_index(key, spans, embed_fn, chunk_size, chunk_overlap, index_dir=INDEX_DIR, meta=None):
+    log.info(f"🏗️ Building vector index {key[:12]}...")
+    chunks, chunk_pages, chunk_spans = [], [], []
+    for span in spans:
+        chunks.append(span.text())
+        chunk_pages.append([span.page_start, span.page_end])
+        chunk_spans.append([span.page_start, span.char_start, span.page_end, span.char_end])
+    embeddings = normalize_rows(embed_fn(chunks)) if chunks else np.zeros((0, 0), dtype=np.float32)
+    if embeddings.shape[0] != len(chunks):
+        raise ValueError(f"Expected {len(chunks)} embeddings, got array of shape {embeddings.shape}")
+
+    os.makedirs(index_dir, exist_ok=True)
+    matrix_path, meta_path = _index_paths(key, index_dir)
+    metadata = dict(meta or {})
+    metadata.update({
+        "version": INDEX_VERSION,
+        "chunk_size": chunk_size,
+        "chunk_overlap": chunk_overlap,
+        "chunks": chunks,
+        "chunk_pages": chunk_pages,
+        "chunk_spans": chunk_spans,
+    })
+    # Matrix first, metadata last: a metadata file on disk means the index is complete.
+    write_atomic(matrix_path, lambda f: np.save(f, embeddings))
+    write_atomic(meta_path, lambda f: f.write(json.dumps(metadata).encode("utf-8")))
+    log.info(f"✅ Indexed {len(chunks)} chunks ({embeddings.shape[1]} dims) → {matrix_path}")
+
+
+def open_index(key, index_dir=INDEX_DIR):
+    matrix_path, meta_path = _index_paths(key, index_dir)
+    if not (os.path.exists(matrix_path) and os.path.exists(meta_path)):
+        return None
+    with open(meta_path, "r") as f:
+        metadata = json.load(f)
+    embeddings = np.load(matrix_path, mmap_mode="r")
+    return VectorIndex(key, metadata["chunks"], metadata["chunk_pages"], metadata["chunk_spans"], embeddings)
+
+
+# === LOOKUP ===
+def load_or_build_index(pdf_path, load_spans, embed_fn, chunk_size, chunk_overlap, model_name, index_dir=INDEX_DIR):
+    stat = os.stat(pdf_path)
+    cache_key = (os.path.abspath(pdf_path), stat.st_mtime_ns, stat.st_size, chunk_size, chunk_overlap,
+                 model_cache_key(model_name), index_dir)
+    index = _open_indexes.get(cache_key)
+    if index is not None:
+        metrics.count("cache_requests", cache="vector_index", result="hit")
+        return index
+
+    pdf_sha256 = file_sha256(pdf_path)
+    key = index_key(pdf_sha256, chunk_size, chunk_overlap, model_name)
+    index = open_index(key, index_dir)
+    if index is None:
+        metrics.count("cache_requests", cache="vector_index", result="miss")
+        meta = {"source": os.path.abspath(pdf_path), "pdf_sha256": pdf_sha256, "model_name": model_cache_key(model_name)}
+        with metrics.stage("vector_index.build"):
+            build_index(key, load_spans(pdf_path), embed_fn, chunk_size, chunk_overlap, index_dir, meta)
+        index = open_index(key, index_dir)
+    else:
+        metrics.count("cache_requests", cache="vector_index", result="hit")
+        log.info(f"📂 Reusing vector index {key[:12]} ({len(index)} chunks)")
+
+    _open_indexes[cache_key] = index
+    return index
+
+
+# === SCORING ===
+def merge_windows(hits, window_size, num_chunks):
+    # hits: (chunk index, score) pairs. Returns [start, end) windows sorted by best score.
+    windows = sorted(
+        (max(0, i - window_size), min(num_chunks, i + window_size + 1), score, i)
+        for i, score in hits
+    )
+    merged = []
+    for start, end, score, best in windows:
+        if merged and start <= merged[-1][1]:
+            last = merged[-1]
+            last[1] = max(last[1], end)
+            if score > last[2]:
+                last[2], last[3] = score, best
+        else:
+            merged.append([start, end, score, best])
+    merged.sort(key=lambda w: -w[2])
+    return merged
+
+
+def top_k_windows(index, query_vectors, top_k, window_size):
+    if len(query_vectors) == 0:
+        return []
+    if len(index) == 0:
+        return [[] for _ in range(len(query_vectors))]
+
+    # Both sides are unit length, so one matrix product gives every cosine score.
+    scores = normalize_rows(query_vectors) @ index.embeddings.T
+    k = min(top_k, scores.shape[1])
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+
+    results = []
+    for row, candidates in zip(scores, top):
+        hits = [(int(i), float(row[i])) for i in candidates]
+        results.append([
+            {
+                "start": start,
+                "end": end,
+                "best_chunk": best,
+                "score": score,
+                "pages": [index.chunk_pages[start][0] + 1, index.chunk_pages[end - 1][1] + 1],  # 1-based, like ChunkSpan.pages
+            }
+            for start, end, score, best in merge_windows(hits, window_size, len(index))
+        ])
+    return results
@@ -0,0 +1,93 @@
+import json
+
+import pytest
+
+import batch_runner
+from batch_runner import iter_transcripts, load_completed, percentile, run_batch
+
+
+def write_lines(path, lines):
+    with open(path, "w") as f:
+        f.write("".join(lines))
+
+
+def test_load_completed_missing_file(tmp_path):
+    assert load_completed(str(tmp_path / "results.jsonl")) == set()
+
+
+def test_load_completed_counts_only_ok_results(tmp_path):
+    path = tmp_path / "results.jsonl"
+    write_lines(path, [
+        json.dumps({"id": "a", "status": "ok"}) + "\n",
+        json.dumps({"id": "b", "status": "error", "error": "boom"}) + "\n",
+    ])
+    assert load_completed(str(path)) == {"a"}
+
+
+def test_load_completed_truncates_partial_last_line(tmp_path):
+    path = tmp_path / "results.jsonl"
+    write_lines(path, [json.dumps({"id": "a", "status": "ok"}) + "\n", '{"id": "b", "sta'])
+    assert load_completed(str(path)) == {"a"}
+    assert path.read_text() == json.dumps({"id": "a", "status": "ok"}) + "\n"
+
+
+def test_load_completed_truncates_lone_partial_line(tmp_path):
+    path = tmp_path / "results.jsonl"
+    write_lines(path, ['{"id": "a"'])
+    assert load_completed(str(path)) == set()
+    assert path.read_text() == ""
+
+
+def test_iter_transcripts_from_jsonl_and_directory(tmp_path):
+    source = tmp_path / "calls.jsonl"
+    write_lines(source, [json.dumps({"transcript": "x"}) + "\n", "\n", json.dumps({"id": "c2", "transcript": "y"}) + "\n"])
+    assert [r["id"] for r in iter_transcripts(str(source))] == ["line-1", "c2"]
+
+    folder = tmp_path / "calls"
+    folder.mkdir()
+    (folder / "b.txt").write_text("[00:01] Agent: hi")
+    (folder / "a.json").write_text(json.dumps({"transcript": "t", "product_types": ["FX_Forward"]}))
+    (folder / "notes.md").write_text("ignored")
+    records = list(iter_transcripts(str(folder)))
+    assert [(r["id"], r["transcript"]) for r in records] == [("a", "t"), ("b", "[00:01] Agent: hi")]
+
+
+def test_percentile_nearest_rank():
+    assert percentile([], 95) == 0.0
+    assert percentile([3, 1, 2, 4], 50) == 2
+    assert percentile([3, 1, 2, 4], 95) == 4
+
+
+@pytest.fixture
+def fake_pipeline(monkeypatch):
+    calls = []
+
+    def run_compliance_pipeline(transcript, product_types, risk_scenarios=None):
+        calls.append(transcript)
+        if transcript == "fail":
+            raise RuntimeError("model unavailable")
+        return {"entities": [], "order_checks": [], "suitability_checks": []}
+
+    monkeypatch.setattr(batch_runner, "run_compliance_pipeline", run_compliance_pipeline)
+    monkeypatch.setattr(batch_runner, "set_llm_concurrency", lambda n: None)
+    return calls
+
+
+def test_run_batch_resumes_and_retries_failures(tmp_path, fake_pipeline):
+    source, output = tmp_path / "calls.jsonl", tmp_path / "results.jsonl"
+    write_lines(source, [json.dumps({"id": f"c{i}", "transcript": "fail" if i == 2 else f"t{i}"}) + "\n" for i in range(5)])
+
+    first = run_batch(str(source), str(output), [], workers=2)
+    assert (first["succeeded"], first["failed"], first["skipped_from_checkpoint"]) == (4, 1, 0)
+
+    # simulate a crash mid-write, then resume: only the failed call is scored again
+    with open(output, "a") as f:
+        f.write('{"id": "c9", "sta')
+    fake_pipeline.clear()
+    second = run_batch(str(source), str(output), [], workers=2)
+    assert fake_pipeline == ["fail"]
+    assert (second["processed"], second["skipped_from_checkpoint"]) == (1, 4)
+    lines = [json.loads(line) for line in output.read_text().splitlines()]
+    assert len(lines) == 6
+    assert {line["id"] for line in lines[:5]} == {"c0", "c1", "c2", "c3", "c4"}
+    assert (lines[5]["id"], lines[5]["status"]) == ("c2", "error")
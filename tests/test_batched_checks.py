@@ -0,0 +1,147 @@
+import json
+import re
+import threading
+
+import pytest
+
+import example
+from model_backends import active_backend, use_backend
+
+pytest.importorskip("langchain")
+
+TRANSCRIPT = """[00:01] Agent: Let's discuss FX Forward today.
+[00:20] Agent: The forward rate is fixed and you may lose money if rates move.
+[00:40] Agent: Now Bonds (Secondary): prices fall when yields rise.
+[01:00] Customer: Understood.
+"""
+BATCHED = "Respond with only a JSON array"
+
+
+def item(item_id, product_type="FX Forward", kind="risk_scenario", criteria="You may lose money if rates move."):
+    return {"id": item_id, "kind": kind, "product_type": product_type, "criteria": criteria, "terms": [product_type]}
+
+
+def ids_in(prompt):
+    return re.findall(r"\[id: (\w+)\]", prompt)
+
+
+def all_passed(prompt):
+    return json.dumps([{"id": i, "passed": True, "summary": "ok", "reasons": ""} for i in ids_in(prompt)])
+
+
+@pytest.fixture
+def llm():
+    # Fake LLM whose replies come from llm.reply(prompt); every prompt is recorded
+    previous = active_backend()
+    prompts = []
+    lock = threading.Lock()
+
+    class Fake:
+        reply = staticmethod(all_passed)
+
+        def batched(self):
+            return [p for p in prompts if BATCHED in p]
+
+        def single(self):
+            return [p for p in prompts if BATCHED not in p]
+
+    fake = Fake()
+
+    def responder(prompt):
+        with lock:
+            prompts.append(prompt)
+        if BATCHED not in prompt:
+            return "Yes\nJustification: checked on its own."
+        return fake.reply(prompt)
+
+    use_backend("fake", llm={"latency": 0.0, "responder": responder})
+    yield fake
+    use_backend(previous)
+
+
+@pytest.mark.parametrize("passed, expected", [
+    (True, True), (False, False), ("true", True), (" False ", False), ("TRUE", True),
+])
+def test_parse_verdicts_accepts_booleans(passed, expected):
+    verdicts = example._parse_verdicts(json.dumps([{"id": "o0", "passed": passed}]))
+    assert verdicts["o0"]["passed"] is expected
+
+
+@pytest.mark.parametrize("passed", ["yes", "no", "false-ish", 1, 0, None, [], {}])
+def test_parse_verdicts_drops_anything_else(passed):
+    assert example._parse_verdicts(json.dumps([{"id": "o0", "passed": passed}])) == {}
+
+
+def test_parse_verdicts_finds_the_array_and_skips_entries_without_id():
+    raw = 'Here you go:\n[{"id": 3, "passed": false}, {"passed": true}, "noise"]\nThanks'
+    assert example._parse_verdicts(raw) == {"3": {"id": 3, "passed": False}}
+    with pytest.raises(ValueError):
+        example._parse_verdicts("I could not decide.")
+
+
+def test_to_result_formats_both_kinds():
+    order = example._to_result(item("o0", kind="order_taking"), {"passed": False, "summary": "Missed.", "reasons": "No price"})
+    assert order == {"product_type": "FX Forward", "check_result": "Checklist followed: No\nPass/Fail: Fail\nMissed.\nReasons for failure: No price"}
+    risk = example._to_result(item("r0"), {"passed": True, "summary": "Disclosed.", "reasons": "ignored"})
+    assert risk == {"product_type": "FX Forward", "suitability_result": "Yes\nJustification: Disclosed."}
+
+
+def test_pack_batches_respects_the_budget():
+    items = [item(f"r{i}") for i in range(5)]
+    one = example._batch_tokens(TRANSCRIPT, items[:1])
+    assert example.pack_batches(TRANSCRIPT, items, token_budget=10 ** 6) == [items]
+    assert example.pack_batches(TRANSCRIPT, items, token_budget=one) == [[i] for i in items]
+    two = example._batch_tokens(TRANSCRIPT, items[:2])
+    assert [len(b) for b in example.pack_batches(TRANSCRIPT, items, token_budget=two)] == [2, 2, 1]
+    assert example.pack_batches(TRANSCRIPT, [], token_budget=two) == []
+
+
+def test_pack_batches_gives_an_oversized_item_its_own_batch():
+    items = [item("r0"), item("r1", criteria="word " * 4000), item("r2")]
+    assert example.pack_batches(TRANSCRIPT, items, token_budget=2000) == [[items[0]], [items[1]], [items[2]]]
+
+
+def test_run_batch_sends_one_request(llm):
+    items = [item("r0"), item("r1", "Bonds (Secondary)")]
+    results = example._run_batch(TRANSCRIPT, items)
+    assert len(llm.batched()) == 1 and llm.single() == []
+    assert results["r1"] == {"product_type": "Bonds (Secondary)", "suitability_result": "Yes\nJustification: ok"}
+
+
+def test_run_batch_splits_unparseable_replies(llm):
+    llm.reply = lambda prompt: "All items look fine to me." if len(ids_in(prompt)) > 2 else all_passed(prompt)
+    results = example._run_batch(TRANSCRIPT, [item(f"r{i}") for i in range(4)])
+    assert sorted(len(ids_in(p)) for p in llm.batched()) == [2, 2, 4]
+    assert all(r["suitability_result"] == "Yes\nJustification: ok" for r in results.values())
+    assert sorted(results) == ["r0", "r1", "r2", "r3"]
+
+
+def test_run_batch_splits_on_context_length_errors(llm):
+    def reply(prompt):
+        if len(ids_in(prompt)) > 1:
+            raise ValueError("This model's maximum context length is 4097 tokens")
+        return "[]"
+
+    llm.reply = reply
+    results = example._run_batch(TRANSCRIPT, [item("r0"), item("r1")])
+    # halves of one item are checked with the single-item prompt
+    assert len(llm.single()) == 2
+    assert results["r0"]["suitability_result"] == "Yes\nJustification: checked on its own."
+
+
+def test_run_batch_splits_over_the_context_limit_before_sending(llm, monkeypatch):
+    items = [item(f"r{i}") for i in range(4)]
+    monkeypatch.setattr(example, "CONTEXT_TOKEN_LIMIT", example._batch_tokens(TRANSCRIPT, items[:2]))
+    example._run_batch(TRANSCRIPT, items)
+    assert sorted(len(ids_in(p)) for p in llm.batched()) == [2, 2]
+
+
+def test_run_batch_rechecks_skipped_and_undecided_items(llm):
+    llm.reply = lambda prompt: json.dumps([
+        {"id": "r0", "passed": False, "summary": "Not said.", "reasons": "Missing."},
+        {"id": "r1", "passed": "maybe", "summary": "?"},
+    ])
+    results = example._run_batch(TRANSCRIPT, [item("r0"), item("r1"), item("r2")])
+    assert results["r0"]["suitability_result"] == "No\nJustification: Not said. Missing."
+    assert results["r1"]["suitability_result"] == results["r2"]["suitability_result"] == "Yes\nJustification: checked on its own."
+    assert len(llm.batched()) == 1 and len(llm.single()) == 2
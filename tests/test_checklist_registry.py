@@ -0,0 +1,112 @@
+import os
+
+import pytest
+
+from checklist_registry import ChecklistRegistry, RegistryValidationError, normalize_product_type
+
+
+def write(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+    return path
+
+
+def bump_mtime(path):
+    # Some filesystems keep coarse mtimes; make the change visible regardless
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+@pytest.fixture
+def folders(tmp_path):
+    checklists, scenarios = tmp_path / "checklists", tmp_path / "scenarios"
+    write(checklists / "FX Forward.txt", "1. Disclose the forward rate")
+    write(checklists / "Bonds (Secondary).txt", "1. Disclose the yield")
+    write(scenarios / "FX Forward.txt", "Scenario: client misunderstands settlement")
+    return checklists, scenarios
+
+
+def make_registry(folders, **options):
+    checklists, scenarios = folders
+    return ChecklistRegistry(str(checklists), str(scenarios), reload_interval=0, **options)
+
+
+def test_normalize_product_type():
+    assert normalize_product_type(" FX_Forward ") == normalize_product_type("fx-forward") == "fx forward"
+
+
+@pytest.mark.parametrize("name", ["FX Forward", "fx forward", "FX_FORWARD", "fx-forward", "Forward", "fx  fwd"])
+def test_aliases_resolve_regardless_of_case_and_separators(folders, name):
+    write(folders[0] / "product_aliases.yaml", "FX Forward: [Forward, FX-Fwd]\n")
+    registry = make_registry(folders)
+    assert registry.resolve(name) == "FX Forward"
+    assert registry.get_checklist(name) == "1. Disclose the forward rate"
+    assert registry.get_risk_scenario(name) == "Scenario: client misunderstands settlement"
+
+
+def test_unknown_product_type(folders):
+    registry = make_registry(folders)
+    assert registry.resolve("Swaption") is None
+    assert registry.get_checklist("Swaption") is None
+    assert registry.names_for("Swaption") == ["Swaption"]
+    assert registry.get_risk_scenario("Bonds (Secondary)") is None
+
+
+def test_names_for_lists_every_alias(folders):
+    write(folders[0] / "product_aliases.yaml", "Bonds (Secondary): [Secondary Bonds, Bond]\n")
+    registry = make_registry(folders)
+    assert sorted(registry.names_for("bond")) == sorted(
+        ["Bonds (Secondary)", "bonds (secondary)", "secondary bonds", "bond"]
+    )
+
+
+def test_reloads_when_a_file_changes(folders):
+    registry = make_registry(folders)
+    path = write(folders[0] / "FX Forward.txt", "1. Disclose the forward points")
+    bump_mtime(path)
+    assert registry.get_checklist("FX Forward") == "1. Disclose the forward points"
+
+
+def test_reloads_new_and_removed_files(folders):
+    registry = make_registry(folders)
+    write(folders[0] / "Swaption.txt", "1. Disclose the premium")
+    os.remove(folders[0] / "Bonds (Secondary).txt")
+    assert registry.get_checklist("swaption") == "1. Disclose the premium"
+    assert registry.get_checklist("Bonds (Secondary)") is None
+
+
+def test_does_not_reload_within_interval(folders):
+    checklists, scenarios = folders
+    registry = ChecklistRegistry(str(checklists), str(scenarios), reload_interval=3600)
+    bump_mtime(write(checklists / "FX Forward.txt", "changed"))
+    assert registry.get_checklist("FX Forward") == "1. Disclose the forward rate"
+
+
+@pytest.mark.parametrize("setup, message", [
+    (lambda c: write(c / "Empty.txt", "  \n"), "is empty"),
+    (lambda c: write(c / "product_aliases.yaml", "Swaption: [Swpn]\n"), "has no checklist"),
+    (lambda c: write(c / "product_aliases.yaml", "FX Forward: [Fwd]\nBonds (Secondary): [fwd]\n"), "maps to both"),
+])
+def test_strict_mode_raises_on_problems(folders, setup, message):
+    setup(folders[0])
+    with pytest.raises(RegistryValidationError, match=message):
+        make_registry(folders, strict=True)
+
+
+def test_strict_mode_raises_without_checklists(tmp_path):
+    with pytest.raises(RegistryValidationError, match="no checklists"):
+        ChecklistRegistry(str(tmp_path / "missing"), str(tmp_path / "missing"), strict=True)
+
+
+def test_alias_conflict_keeps_the_first_target(folders):
+    write(folders[0] / "product_aliases.yaml", "FX Forward: [Fwd]\nBonds (Secondary): [fwd]\n")
+    registry = make_registry(folders)
+    assert registry.resolve("fwd") == "FX Forward"
+
+
+def test_alias_cannot_take_over_a_product_name(folders):
+    write(folders[0] / "product_aliases.yaml", "Bonds (Secondary): [FX Forward]\n")
+    registry = make_registry(folders)
+    assert registry.resolve("FX Forward") == "FX Forward"
+    with pytest.raises(RegistryValidationError, match="maps to both"):
+        make_registry(folders, strict=True)
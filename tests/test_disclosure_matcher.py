@@ -0,0 +1,83 @@
+import pytest
+
+from disclosure_matcher import DisclosureMatcher
+from model_backends import active_backend, use_backend
+from stage1_ingestion.fake_models import FakeEmbeddings
+
+SCRIPT = "the value of your forward contract may fall sharply if exchange rates move"
+TRANSCRIPT = f"""[00:01] Agent: Good morning, thanks for calling.
+[00:10] Customer: I want to book a trade.
+[00:20] Agent: {SCRIPT}.
+[00:35] Customer: Understood, go ahead.
+"""
+
+
+def make_matcher(**options):
+    model = FakeEmbeddings(latency=0.0)
+    return DisclosureMatcher(model, **options), model
+
+
+@pytest.mark.parametrize("score, expected", [(0.99, True), (0.85, True), (0.84, None), (0.60, None), (0.59, False), (-1.0, False)])
+def test_decide_thresholds(score, expected):
+    assert make_matcher()[0].decide(score) is expected
+
+
+def test_score_finds_the_window_with_the_script():
+    matcher, _ = make_matcher(window_utterances=1)
+    (score, window), = matcher.score(TRANSCRIPT, [(SCRIPT, None)])
+    assert window == 2
+    assert matcher.decide(score) is True
+
+
+def test_score_only_considers_windows_overlapping_the_discussion():
+    matcher, _ = make_matcher(window_utterances=1)
+    whole, early, late = matcher.score(TRANSCRIPT, [(SCRIPT, None), (SCRIPT, (0, 1)), (SCRIPT, (2, 3))])
+    assert early[1] in (0, 1) and early[0] < whole[0]
+    assert matcher.decide(early[0]) is False
+    assert late == whole
+
+
+def test_windows_span_utterances_and_overlap_by_bounds():
+    matcher, _ = make_matcher(window_utterances=2)
+    # windows are (0, 1), (1, 2), (2, 3): only the last one touches utterance 3
+    (score, window), = matcher.score(TRANSCRIPT, [(SCRIPT, (3, 3))])
+    assert window == 2
+    assert matcher.describe(TRANSCRIPT, True, score, window).startswith("Yes\nJustification: the transcript at [00:20]-[00:35]")
+
+
+def test_no_overlapping_window_scores_nothing():
+    matcher, _ = make_matcher(window_utterances=1)
+    assert matcher.score(TRANSCRIPT, [(SCRIPT, (7, 9))]) == [(-1.0, None)]
+
+
+def test_empty_transcript_or_checks():
+    matcher, _ = make_matcher()
+    assert matcher.score("", [(SCRIPT, None)]) == [(0.0, None)]
+    assert matcher.score(TRANSCRIPT, []) == []
+
+
+def test_transcript_windows_and_scripts_are_embedded_once():
+    matcher, model = make_matcher(window_utterances=1)
+    matcher.score(TRANSCRIPT, [(SCRIPT, None)])
+    embedded = model.texts
+    matcher.score(TRANSCRIPT, [(SCRIPT, (0, 1)), (SCRIPT, None)])
+    assert embedded == 5 and model.texts == embedded
+
+
+@pytest.fixture
+def restore_backend():
+    previous = active_backend()
+    yield
+    use_backend(previous)
+
+
+def test_cached_vectors_are_dropped_when_the_model_changes(restore_backend):
+    matcher = DisclosureMatcher(window_utterances=1)
+    use_backend("fake", embeddings={"latency": 0.0, "dimensions": 256})
+    before = matcher.score(TRANSCRIPT, [(SCRIPT, None)])
+    assert matcher._windows(TRANSCRIPT)[0].shape[1] == 256
+
+    use_backend("fake", embeddings={"latency": 0.0, "dimensions": 64})
+    after = matcher.score(TRANSCRIPT, [(SCRIPT, None)])
+    assert matcher._windows(TRANSCRIPT)[0].shape[1] == 64
+    assert after[0][1] == before[0][1] == 2
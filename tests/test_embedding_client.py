@@ -0,0 +1,88 @@
+import time
+import threading
+
+import numpy as np
+import pytest
+
+from embedding_client import EmbeddingClient
+from stage1_ingestion.fake_models import FakeEmbeddings, FakeTextEmbeddingModel, hashed_embedding
+
+
+def test_returns_contiguous_float32_rows_in_input_order():
+    client = EmbeddingClient(model=FakeTextEmbeddingModel(latency=0))
+    matrix = client.embed(["fx forward", "bond", "fx forward"])
+    assert matrix.dtype == np.float32 and matrix.flags["C_CONTIGUOUS"]
+    assert matrix.shape == (3, 256)
+    assert np.array_equal(matrix[1], np.asarray(hashed_embedding("bond"), dtype=np.float32))
+    assert np.array_equal(matrix[0], matrix[2])
+
+
+def test_empty_input():
+    client = EmbeddingClient(model=FakeTextEmbeddingModel(latency=0))
+    assert client.embed([]).shape == (0, 0)
+
+
+def test_dedupes_within_and_across_calls():
+    model = FakeEmbeddings(latency=0)
+    client = EmbeddingClient("embeddings", model=model)
+    client.embed(["a", "b", "a", "a"])
+    client.embed(["b", "c"])
+    assert model.texts == 3
+    assert model.usage()["calls"] == 2
+
+
+def test_splits_by_text_count_and_token_budget():
+    model = FakeTextEmbeddingModel(latency=0, max_batch_size=4, max_batch_tokens=100)
+    client = EmbeddingClient(model=model, max_batch_size=4, max_batch_tokens=100)
+    short = [f"chunk {i}" for i in range(10)]     # 3 tokens each: the text limit applies
+    long = [f"{i} " + "x" * 200 for i in range(5)]  # ~51 tokens each: the token limit applies
+    assert client.embed(short).shape == (10, 256)
+    assert model.usage()["calls"] == 3
+    assert client.embed(long).shape == (5, 256)
+    assert model.usage()["calls"] == 3 + 5
+
+
+def test_oversized_text_goes_alone():
+    model = FakeTextEmbeddingModel(latency=0, max_batch_tokens=100)
+    client = EmbeddingClient(model=model, max_batch_tokens=100)
+    assert client.embed(["y" * 1000, "short", "also short"]).shape == (3, 256)
+    assert model.usage()["calls"] == 2
+
+
+def test_sub_batches_run_concurrently():
+    model = FakeTextEmbeddingModel(latency=0.1)
+    client = EmbeddingClient(model=model, max_batch_size=10, max_concurrent_batches=4)
+    started = time.monotonic()
+    client.embed([f"text {i}" for i in range(40)])
+    assert model.usage()["calls"] == 4
+    assert time.monotonic() - started < 0.3
+
+
+def test_concurrent_callers_share_batches():
+    model = FakeTextEmbeddingModel(latency=0.05)
+    client = EmbeddingClient(model=model, coalesce_seconds=0.02)
+    barrier = threading.Barrier(20)
+    results = {}
+
+    def caller(i):
+        barrier.wait()
+        results[i] = client.embed([f"product {i}", "boilerplate"])
+
+    threads = [threading.Thread(target=caller, args=(i,)) for i in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert model.texts == 21
+    assert model.usage()["calls"] < 20
+    assert all(np.array_equal(results[i][1], results[0][1]) for i in results)
+
+
+def test_failures_reach_every_waiting_caller_and_are_not_cached():
+    model = FakeTextEmbeddingModel(latency=0, failure_rate=1.0)
+    client = EmbeddingClient(model=model)
+    with pytest.raises(ConnectionError):
+        client.embed(["a", "b"])
+    model.failure_rate = 0.0
+    assert client.embed(["a", "b"]).shape == (2, 256)
+    assert model.texts == 2
@@ -0,0 +1,139 @@
+import asyncio
+
+from live_monitor import WINDOW_CLOSE_SECONDS, CallTracker, LiveMonitor
+from transcript_index import PADDING_SECONDS, MentionScanner
+
+PRODUCTS = {"FX Forward": ["FX Forward", "fx-forward"], "Bonds": ["Bonds", "bond"]}
+DISCLOSURES = {"FX Risk": ["exchange rate risk"], "Yield Risk": ["yield risk"]}
+REQUIRED = {"FX Forward": ["FX Risk"], "Bonds": ["Yield Risk"]}
+
+
+def make_tracker(**options):
+    return CallTracker("call-1", MentionScanner(PRODUCTS), MentionScanner(DISCLOSURES), REQUIRED, **options)
+
+
+def stamp(seconds):
+    return f"[{seconds // 60:02d}:{seconds % 60:02d}]"
+
+
+def test_window_closes_after_close_seconds():
+    tracker = make_tracker()
+    assert tracker.push(f"{stamp(10)} Agent: Let's talk about the FX Forward.") == []
+    assert tracker.next_deadline == 10 + WINDOW_CLOSE_SECONDS
+    # exactly at the deadline the window is still open
+    assert tracker.push(f"{stamp(10 + WINDOW_CLOSE_SECONDS)} Customer: Sure.") == []
+    alerts = tracker.push(f"{stamp(11 + WINDOW_CLOSE_SECONDS)} Customer: What else?")
+    assert alerts == [{
+        "call_id": "call-1", "product": "FX Forward", "missing_disclosures": ["FX Risk"],
+        "window_start": "00:10", "window_end": "00:10", "raised_at": stamp(11 + WINDOW_CLOSE_SECONDS)[1:-1],
+    }]
+    assert tracker.alerts == alerts
+    assert tracker.snapshot()["open_products"] == [] and tracker.next_deadline is None
+
+
+def test_mentions_keep_the_window_open():
+    tracker = make_tracker(close_after=30)
+    tracker.push([f"{stamp(0)} Agent: FX Forward first.", f"{stamp(25)} Agent: the fx-forward again."])
+    assert tracker.push(f"{stamp(50)} Agent: Still here.") == []
+    assert tracker.next_deadline == 55
+    assert tracker.products_discussed == [
+        {"name": "FX Forward", "start_time": "00:00", "end_time": "00:25", "mentions": ["00:00", "00:25"]},
+    ]
+
+
+def test_disclosures_within_the_window_or_lookback_count():
+    tracker = make_tracker(close_after=30)
+    tracker.push([
+        f"{stamp(100 - PADDING_SECONDS)} Agent: There is exchange rate risk.",
+        f"{stamp(100)} Agent: On the FX Forward,",
+        f"{stamp(120)} Agent: and bonds carry",
+        "yield risk too.",
+    ])
+    assert tracker.finish() == []
+    assert tracker.disclosure_mentions == {"FX Risk": ["01:25"], "Yield Risk": ["02:00"]}
+
+
+def test_disclosures_before_the_lookback_or_after_the_window_do_not_count():
+    tracker = make_tracker(close_after=30)
+    tracker.push([
+        f"{stamp(99 - PADDING_SECONDS)} Agent: There is exchange rate risk.",
+        f"{stamp(100)} Agent: On the FX Forward.",
+    ])
+    assert [a["product"] for a in tracker.push(f"{stamp(131)} Agent: exchange rate risk.")] == ["FX Forward"]
+
+
+def test_mention_after_a_gap_opens_a_new_window():
+    tracker = make_tracker(close_after=30)
+    tracker.push(f"{stamp(0)} Agent: FX Forward.")
+    first = tracker.push(f"{stamp(60)} Agent: Back to the FX Forward.")
+    assert [(a["window_start"], a["window_end"]) for a in first] == [("00:00", "00:00")]
+    tracker.push(f"{stamp(70)} Agent: mind the exchange rate risk.")
+    assert tracker.finish() == []
+    assert tracker.products_discussed[0]["mentions"] == ["00:00", "01:00"]
+
+
+def test_finish_flushes_open_windows():
+    tracker = make_tracker()
+    tracker.push([f"{stamp(5)} Agent: FX Forward and bonds.", f"{stamp(6)} Agent: yield risk applies."])
+    alerts = tracker.finish()
+    assert [(a["product"], a["missing_disclosures"], a["raised_at"]) for a in alerts] == [("FX Forward", ["FX Risk"], "00:06")]
+    assert tracker.finish() == []
+
+
+def test_untimestamped_lines_before_the_first_utterance_are_ignored():
+    tracker = make_tracker()
+    tracker.push(["FX Forward notes", "", f"{stamp(1)} Agent: hello"])
+    assert tracker.products_discussed == [] and tracker.utterances == 1
+
+
+def test_monitor_sweep_alerts_for_a_silent_call():
+    delivered = []
+
+    async def on_alert(alert):
+        delivered.append(alert)
+
+    async def run():
+        monitor = LiveMonitor(PRODUCTS, DISCLOSURES, REQUIRED, close_after=30, on_alert=on_alert)
+        await monitor.push("quiet", f"{stamp(10)} Agent: Let's book the FX Forward.")
+        await monitor.push("busy", [f"{stamp(10)} Agent: FX Forward,", f"{stamp(11)} Agent: exchange rate risk."])
+        assert await monitor.sweep() == []
+        # 31 seconds of silence on both calls, without waiting for them
+        for tracker in monitor.calls.values():
+            tracker.updated_at -= 31
+        alerts = await monitor.sweep()
+        assert monitor.calls["busy"].snapshot()["open_products"] == []
+        return alerts
+
+    alerts = asyncio.run(run())
+    assert [(a["call_id"], a["product"]) for a in alerts] == [("quiet", "FX Forward")]
+    assert delivered == alerts
+
+
+def test_monitor_end_call_flushes_and_forgets_the_call():
+    async def run():
+        monitor = LiveMonitor(PRODUCTS, DISCLOSURES, REQUIRED, on_alert=lambda alert: None)
+        await monitor.push("c1", f"{stamp(3)} Agent: the bond.")
+        snapshot = await monitor.end_call("c1")
+        return monitor, snapshot
+
+    monitor, snapshot = asyncio.run(run())
+    assert monitor.calls == {}
+    assert [a["product"] for a in snapshot["alerts"]] == ["Bonds"]
+
+
+def test_monitor_background_sweeper():
+    delivered = []
+    sweep_interval = 0.01
+
+    async def run():
+        async with LiveMonitor(PRODUCTS, DISCLOSURES, REQUIRED, close_after=0.05, sweep_interval=sweep_interval,
+                               on_alert=delivered.append) as monitor:
+            await monitor.push("c1", f"{stamp(0)} Agent: FX Forward.")
+            for _ in range(100):
+                if delivered:
+                    break
+                await asyncio.sleep(sweep_interval)
+        assert monitor._sweeper is None
+
+    asyncio.run(run())
+    assert [a["product"] for a in delivered] == ["FX Forward"]
@@ -0,0 +1,68 @@
+import pytest
+
+from transcript_index import MentionScanner, TranscriptIndex, discussion_windows, relevant_excerpt, relevant_window
+
+TRANSCRIPT = """[00:01] Agent: Let's discuss FX Forward today.
+[00:12] Customer: Okay.
+[00:25] Agent: There's liquidity risk
+for this fx-forward as well.
+[00:40] Agent: Now moving on to Bonds (Secondary)...
+[01:10] Customer: Fine.
+[1:02:03] Agent: Anything else?
+"""
+
+
+@pytest.mark.parametrize("transcript", ["", "\n\n", "Agent: we talked about FX Forward 1", "no stamps here\nat all"])
+def test_untimestamped_transcripts_have_no_utterances(transcript):
+    index = TranscriptIndex(transcript)
+    assert len(index) == 0
+    assert relevant_window(transcript, ["FX Forward 1"]) is None
+    assert relevant_excerpt(transcript, ["FX Forward 1"]) == transcript
+
+
+def test_index_parses_timestamps_and_speakers():
+    index = TranscriptIndex(TRANSCRIPT)
+    assert len(index) == 6
+    assert list(index.seconds) == [1, 12, 25, 40, 70, 3723]
+    assert index.speakers[:2] == ["Agent", "Customer"]
+    assert index.timestamp(4) == "01:10"
+
+
+def test_continuation_lines_belong_to_previous_utterance():
+    index = TranscriptIndex(TRANSCRIPT)
+    assert index.text(2) == "[00:25] Agent: There's liquidity risk\nfor this fx-forward as well."
+    assert index.utterance_at(TRANSCRIPT.index("fx-forward")) == 2
+    assert index.text(5) == "[1:02:03] Agent: Anything else?"
+
+
+def test_text_before_first_stamp_is_not_an_utterance():
+    transcript = "Call notes\n[00:05] Agent: hello\n"
+    index = TranscriptIndex(transcript)
+    assert len(index) == 1
+    assert index.utterance_at(0) == -1
+
+
+def test_scanner_normalizes_spelling_and_merges_repeats():
+    scanner = MentionScanner({"FX Forward": ["FX_Forward"], "Bonds": ["bonds (secondary)", "bonds"]})
+    mentions = scanner.scan(TranscriptIndex(TRANSCRIPT))
+    assert mentions == {"FX Forward": [0, 2], "Bonds": [3]}
+    assert discussion_windows(TranscriptIndex(TRANSCRIPT), mentions)[0] == {
+        "name": "FX Forward", "start_time": "00:01", "end_time": "00:25", "mentions": ["00:01", "00:25"],
+    }
+
+
+def test_scanner_respects_word_boundaries():
+    scanner = MentionScanner({"Bond": ["bond"]})
+    assert scanner.labels_in("bondholders and a Bond.") == ["Bond"]
+    assert scanner.labels_in("bondholders only") == []
+    assert MentionScanner({}).labels_in("anything") == []
+
+
+def test_relevant_window_pads_by_utterances_and_seconds():
+    index = TranscriptIndex(TRANSCRIPT)
+    assert index.window([3], padding_utterances=0, padding_seconds=0) == (3, 3)
+    assert index.window([3], padding_utterances=1, padding_seconds=0) == (2, 4)
+    assert index.window([3], padding_utterances=0, padding_seconds=15) == (2, 3)
+    assert relevant_window(TRANSCRIPT, ["bonds"], padding_utterances=0, padding_seconds=0) == (3, 3)
+    assert relevant_window(TRANSCRIPT, ["swaption"]) is None
+    assert relevant_excerpt(TRANSCRIPT, ["swaption"]) == TRANSCRIPT
@@ -0,0 +1,181 @@
+import re
+from array import array
+from bisect import bisect_right
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# ========== CONFIG ==========
+# "[mm:ss] Speaker: text" (or "[hh:mm:ss] ..."), one utterance per line
+UTTERANCE_PATTERN = re.compile(r"^[ \t]*\[(\d{1,2}):(\d{2})(?::(\d{2}))?\][ \t]*([^:\n]{1,40}?)[ \t]*:[ \t]*(.*)$", re.M)
+PADDING_UTTERANCES = 2
+PADDING_SECONDS = 15
+
+
+def format_timestamp(seconds: int) -> str:
+    return f"{seconds // 60:02d}:{seconds % 60:02d}"
+
+
+def utterance_seconds(first: str, second: str, third: Optional[str]) -> int:
+    # UTTERANCE_PATTERN groups 1-3: mm:ss, or hh:mm:ss when the third group is present
+    if third is None:
+        return int(first) * 60 + int(second)
+    return (int(first) * 60 + int(second)) * 60 + int(third)
+
+
+# ========== UTTERANCE INDEX ==========
+class TranscriptIndex:
+    # Parallel arrays rather than one object per utterance: a long call stays a few
+    # machine words per line on top of the transcript string itself.
+    def __init__(self, transcript: str):
+        self.transcript = transcript
+        self.starts = array("l")   # offset of the line in the transcript
+        self.ends = array("l")     # offset just past the utterance
+        self.seconds = array("l")  # timestamp in seconds from call start
+        self.speakers: List[str] = []
+        for match in UTTERANCE_PATTERN.finditer(transcript):
+            self.starts.append(match.start())
+            self.ends.append(match.end())
+            self.seconds.append(utterance_seconds(*match.group(1, 2, 3)))
+            self.speakers.append(match.group(4).strip())
+        # Untimestamped continuation lines belong to the utterance before them.
+        bounds = list(self.starts[1:]) + [len(transcript)] if self.starts else []
+        for i, bound in enumerate(bounds):
+            end = bound
+            while end > self.ends[i] and transcript[end - 1].isspace():
+                end -= 1
+            self.ends[i] = end
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def utterance_at(self, offset: int) -> int:
+        # Index of the utterance containing a character offset (-1 before the first line)
+        return bisect_right(self.starts, offset) - 1
+
+    def text(self, i: int) -> str:
+        return self.transcript[self.starts[i]:self.ends[i]]
+
+    def timestamp(self, i: int) -> str:
+        return format_timestamp(self.seconds[i])
+
+    def excerpt(self, first: int, last: int) -> str:
+        return self.transcript[self.starts[first]:self.ends[last]]
+
+    def window(
+        self,
+        utterances: Iterable[int],
+        padding_utterances: int = PADDING_UTTERANCES,
+        padding_seconds: int = PADDING_SECONDS,
+    ) -> Optional[Tuple[int, int]]:
+        # Span from the first to the last mentioning utterance, widened by a fixed number
+        # of utterances and then by any neighbours within padding_seconds.
+        utterances = sorted(utterances)
+        if not utterances:
+            return None
+        first = max(0, utterances[0] - padding_utterances)
+        last = min(len(self) - 1, utterances[-1] + padding_utterances)
+        while first > 0 and self.seconds[first - 1] >= self.seconds[utterances[0]] - padding_seconds:
+            first -= 1
+        while last < len(self) - 1 and self.seconds[last + 1] <= self.seconds[utterances[-1]] + padding_seconds:
+            last += 1
+        return first, last
+
+
+@lru_cache(maxsize=64)
+def index_transcript(transcript: str) -> TranscriptIndex:
+    return TranscriptIndex(transcript)
+
+
+# ========== MENTION SCANNER ==========
+def _normalize_term(term: str) -> str:
+    # "FX_Forward", "fx-forward" and "FX  Forward" are the same term
+    return re.sub(r"[\s_\-]+", " ", term).strip().casefold()
+
+
+class MentionScanner:
+    # All terms compile into one case-insensitive alternation, so a transcript is scanned
+    # once no matter how many products or disclosures are being tracked.
+    def __init__(self, terms: Dict[str, Iterable[str]]):
+        self.labels: Dict[str, str] = {}
+        for label, names in terms.items():
+            for name in names:
+                if name and name.strip():
+                    self.labels.setdefault(_normalize_term(name), label)
+        alternatives = sorted(self.labels, key=len, reverse=True)
+        self.pattern = re.compile(
+            r"(?<!\w)(?:" + "|".join(r"[\s_\-]+".join(map(re.escape, term.split())) for term in alternatives) + r")(?!\w)",
+            re.IGNORECASE,
+        ) if alternatives else None
+
+    def scan(self, index: TranscriptIndex) -> Dict[str, List[int]]:
+        # label -> sorted utterance indices that mention it
+        mentions: Dict[str, List[int]] = {}
+        if self.pattern is None or not len(index):
+            return mentions
+        for match in self.pattern.finditer(index.transcript):
+            utterance = index.utterance_at(match.start())
+            if utterance < 0:
+                continue
+            found = mentions.setdefault(self.labels[_normalize_term(match.group(0))], [])
+            if not found or found[-1] != utterance:
+                found.append(utterance)
+        return mentions
+
+    def labels_in(self, text: str) -> List[str]:
+        # Labels mentioned in one piece of text, in order of first mention; lets live
+        # calls scan each new utterance once instead of rescanning the whole transcript.
+        if self.pattern is None:
+            return []
+        found: Dict[str, None] = {}
+        for match in self.pattern.finditer(text):
+            found.setdefault(self.labels[_normalize_term(match.group(0))], None)
+        return list(found)
+
+
+@lru_cache(maxsize=256)
+def _scanner(terms: Tuple[str, ...]) -> MentionScanner:
+    return MentionScanner({"match": terms})
+
+
+def discussion_windows(index: TranscriptIndex, mentions: Dict[str, List[int]]) -> List[Dict[str, object]]:
+    # Same shape as products_discussed in langgraph_code.extract_entities_node
+    return [
+        {
+            "name": label,
+            "start_time": index.timestamp(utterances[0]),
+            "end_time": index.timestamp(utterances[-1]),
+            "mentions": [index.timestamp(i) for i in utterances],
+        }
+        for label, utterances in mentions.items()
+    ]
+
+
+def relevant_window(
+    transcript: str,
+    terms: Iterable[str],
+    padding_utterances: int = PADDING_UTTERANCES,
+    padding_seconds: int = PADDING_SECONDS,
+) -> Optional[Tuple[int, int]]:
+    # (first, last) utterance around where any of terms is discussed, or None when the
+    # transcript has no timestamps or never mentions the terms.
+    index = index_transcript(transcript)
+    terms = tuple(sorted({t for t in terms if t}))
+    if not len(index) or not terms:
+        return None
+    utterances = _scanner(terms).scan(index).get("match", [])
+    return index.window(utterances, padding_utterances, padding_seconds)
+
+
+def relevant_excerpt(
+    transcript: str,
+    terms: Iterable[str],
+    padding_utterances: int = PADDING_UTTERANCES,
+    padding_seconds: int = PADDING_SECONDS,
+) -> str:
+    # Only the utterances around where any of terms is discussed. Falls back to the whole
+    # transcript when there is no window, so a check is never run against less than it
+    # would have seen before.
+    window = relevant_window(transcript, terms, padding_utterances, padding_seconds)
+    if window is None:
+        return transcript
+    return index_transcript(transcript).excerpt(*window)